@@ -0,0 +1,67 @@
+# Streaming statistics for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 17/10/2026 20:00
+# Last change: First version
+#
+# Keeps the sample count, mean, standard deviation (Welford's method),
+# minimum, maximum and last value for each channel between log entries.
+# Memory use is fixed - a few preallocated arrays, one entry per channel.
+
+import array
+import math
+
+Stats = ('last', 'mean', 'min', 'max', 'std', 'count')
+
+class Aggregator:
+    def __init__(self, channels):
+        self.count = array.array('L', [0] * channels)
+        self.mean = array.array('f', [0] * channels)
+        self.m2 = array.array('f', [0] * channels)
+        self.min = array.array('f', [0] * channels)
+        self.max = array.array('f', [0] * channels)
+        self.last = array.array('f', [0] * channels)
+
+    # Add a sample x to channel ch
+    def add(self, ch, x):
+        n = self.count[ch] + 1
+        self.count[ch] = n
+        if n == 1:
+            self.mean[ch] = x
+            self.m2[ch] = 0
+            self.min[ch] = x
+            self.max[ch] = x
+        else:
+            delta = x - self.mean[ch]
+            self.mean[ch] += delta / n
+            self.m2[ch] += delta * (x - self.mean[ch])
+            if x < self.min[ch]:
+                self.min[ch] = x
+            if x > self.max[ch]:
+                self.max[ch] = x
+        self.last[ch] = x
+
+    # Return one statistic for channel ch (None if there were no samples)
+    def get(self, ch, stat):
+        n = self.count[ch]
+        if n == 0:
+            return None
+        if stat == 'mean':
+            return round(self.mean[ch], 3)
+        if stat == 'min':
+            return round(self.min[ch], 3)
+        if stat == 'max':
+            return round(self.max[ch], 3)
+        if stat == 'std':
+            return round(math.sqrt(self.m2[ch] / (n - 1)), 3) if n > 1 else 0.0
+        if stat == 'count':
+            return n
+        return round(self.last[ch], 3)
+
+    # Return all the statistics for channel ch
+    def summary(self, ch):
+        return {stat: self.get(ch, stat) for stat in Stats}
+
+    # Start the next interval
+    def clear(self):
+        for ch in range(len(self.count)):
+            self.count[ch] = 0
@@ -0,0 +1,129 @@
+# Threshold alarms for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 07:15
+# Last change: IFTTT request timeout
+#
+# Each new sample is checked against the HighWarning / HighReset and
+# LowWarning / LowReset thresholds in sensors.py. An alarm is raised when a
+# value reaches the warning threshold and only cleared once it is back past
+# the reset threshold (hysteresis), so a value sitting on the threshold does
+# not keep raising & clearing the alarm.
+#
+# Changes are pushed straight away (not at the next log interval) to a
+# Domoticz Alert device and / or an IFTTT webhook. Each sensor sends at most
+# one notification per 'interval' seconds - a change inside that time is
+# held back and the sensor's state at the end of it is sent, so a flapping
+# sensor cannot flood the network but the last state always gets through.
+
+import time
+
+# Alarm states
+OK = 0
+HIGH = 1
+LOW = 2
+Names = ('OK', 'HIGH', 'LOW')
+
+# Time before a notification that could not be sent is tried again (ms)
+RetryDelay = 30000
+
+class Alarms:
+    def __init__(self, high, high_reset, low, low_reset, interval):
+        n = len(high)
+        self.high = high
+        self.high_reset = high_reset
+        self.low = low
+        self.low_reset = low_reset
+        self.interval = interval * 1000
+        self.state = bytearray(n)               # Current state of each sensor
+        self.notified = bytearray(n)            # State last sent for each sensor
+        self.value = [None] * n                 # Value that caused the current state
+        self.sent_at = [None] * n               # ticks_ms of the last notification
+        self.retry_at = [None] * n              # ticks_ms when a failed notification is tried again
+        self.raised = 0
+        self.sent = 0
+        self.held = 0                           # Changes not sent straight away (rate limited)
+
+    # Function to check a new value, returns True if the sensor's alarm state changed
+    # (T & H pairs are checked on the first value, the temperature)
+    def check(self, SensorID, value):
+        if isinstance(value, tuple):
+            value = value[0]
+        if value is None:
+            return False
+        state = self.state[SensorID]
+        high = self.high[SensorID] != 0 or self.high_reset[SensorID] != 0
+        low = self.low[SensorID] != 0 or self.low_reset[SensorID] != 0
+        new = state
+        if state == HIGH:
+            if value <= self.high_reset[SensorID]:
+                new = OK
+        elif state == LOW:
+            if value >= self.low_reset[SensorID]:
+                new = OK
+        if new == OK:
+            if high and value >= self.high[SensorID]:
+                new = HIGH
+            elif low and value <= self.low[SensorID]:
+                new = LOW
+        if new == state:
+            return False
+        self.state[SensorID] = new
+        self.value[SensorID] = value
+        if new != OK:
+            self.raised += 1
+        last = self.sent_at[SensorID]
+        if last is not None and time.ticks_diff(time.ticks_ms(), last) < self.interval:
+            self.held += 1
+        return True
+
+    # Function to send the notifications due, using send(SensorID, state, value)
+    # which returns True if the notification was sent
+    def notify(self, send):
+        now = time.ticks_ms()
+        for SensorID in range(len(self.state)):
+            state = self.state[SensorID]
+            if state == self.notified[SensorID]:
+                continue
+            last = self.sent_at[SensorID]
+            if last is not None and time.ticks_diff(now, last) < self.interval:
+                continue
+            retry = self.retry_at[SensorID]
+            if retry is not None and time.ticks_diff(now, retry) < 0:
+                continue
+            if send(SensorID, state, self.value[SensorID]):
+                self.notified[SensorID] = state
+                self.sent_at[SensorID] = now
+                self.retry_at[SensorID] = None
+                self.sent += 1
+            else:
+                self.retry_at[SensorID] = time.ticks_add(now, RetryDelay)
+
+    # Function to return the sensors with an alarm raised...
+    def active(self):
+        return [SensorID for SensorID in range(len(self.state)) if self.state[SensorID] != OK]
+
+    def stats(self):
+        return {
+            'active': len(self.active()),
+            'raised': self.raised,
+            'sent': self.sent,
+            'held': self.held,
+        }
+
+# IFTTT webhook URL (event, key) - value1 = sensor name, value2 = state, value3 = value
+IFTTTUrl = 'http://maker.ifttt.com/trigger/%s/with/key/%s'
+IFTTTTimeout = 5                                # Seconds
+
+# Function to trigger an IFTTT webhook, returns True if it was accepted...
+def IFTTT(event, key, value1, value2, value3):
+    import urequests
+    import domoticz
+    url = (IFTTTUrl % (event, key) + '?value1=' + domoticz.Quote(value1) +
+           '&value2=' + domoticz.Quote(value2) + '&value3=' + domoticz.Quote(value3))
+    try:
+        r = urequests.get(url, timeout=IFTTTTimeout)
+        ok = r.status_code == 200
+        r.close()
+        return ok
+    except Exception:
+        return False
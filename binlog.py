@@ -0,0 +1,67 @@
+# Compact binary log file for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 17/10/2026 16:00
+# Last change: First version
+#
+# Each log entry is a fixed size record instead of a line of text:
+#   header: magic 'PLOG', version, epoch year, channels, length of names, names
+#           (names are the channel names separated by ',')
+#   record: timestamp (uint32), reading (uint32), one float32 per channel
+#
+# Use tools/plog2csv.py on the host to convert a log back to CSV.
+# Channels with no value are written as NaN.
+
+import struct
+import time
+import os
+
+_MAGIC = b'PLOG'
+_VERSION = 1
+_HEADER = '<4sBHBH'
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_NAN = float('nan')
+
+class BinLog:
+    def __init__(self, filename, names):
+        self.filename = filename
+        self.channels = len(names)
+        names = ','.join(names).encode()
+        self.header = struct.pack(_HEADER, _MAGIC, _VERSION, time.gmtime(0)[0], self.channels, len(names)) + names
+        self.record = bytearray(8 + 4 * self.channels)
+        self.rows = 0
+        self.bytes = 0
+
+        # Start a new file if the sensor configuration has changed
+        try:
+            with open(filename, 'rb') as f:
+                header = f.read(len(self.header))
+            if header != self.header:
+                try:
+                    os.remove(filename + '.old')
+                except:
+                    pass
+                os.rename(filename, filename + '.old')
+        except OSError:
+            pass
+
+        self.file = open(filename, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(self.header)
+            self.bytes += len(self.header)
+        self.file.flush()
+
+    # Write one record, values holds one number (or None) per channel
+    def write(self, ts, reading, values):
+        record = self.record
+        struct.pack_into('<II', record, 0, ts, reading)
+        offset = 8
+        for v in values:
+            struct.pack_into('<f', record, offset, _NAN if v is None else v)
+            offset += 4
+        self.file.write(record)
+        self.file.flush()
+        self.rows += 1
+        self.bytes += len(record)
+
+    def close(self):
+        self.file.close()
@@ -0,0 +1,57 @@
+# Report by exception for PicoLogger uploads (Raspberry Pi Pico version)
+#
+# Last changed: 17/10/2026 21:00
+# Last change: First version
+#
+# A value is only uploaded when it has moved outside its deadband since the
+# last value sent, or when nothing has been sent for 'heartbeat' seconds
+# (so the sensor does not look dead in Domoticz).
+# The deadband is absolute (band) and / or relative to the last value sent
+# (pct, in %). A sensor with neither set is always sent.
+
+class Deadband:
+    def __init__(self, band, pct, heartbeat):
+        self.band = band
+        self.pct = pct
+        self.heartbeat = heartbeat
+        self.last = [None] * len(band)    # Last value sent
+        self.sent_at = [0] * len(band)    # time.time() when it was sent
+        self.sent = 0
+        self.suppressed = 0
+
+    # Return True if value should be sent for SensorID (and remember it as sent)
+    def check(self, SensorID, value, now):
+        last = self.last[SensorID]
+        send = (last is None
+                or (self.band[SensorID] == 0 and self.pct[SensorID] == 0)
+                or now - self.sent_at[SensorID] >= self.heartbeat)
+        if not send:
+            if isinstance(value, tuple):
+                for n in range(len(value)):
+                    send = send or self.moved(SensorID, value[n], last[n])
+            else:
+                send = self.moved(SensorID, value, last)
+
+        if send:
+            self.last[SensorID] = value
+            self.sent_at[SensorID] = now
+            self.sent += 1
+        else:
+            self.suppressed += 1
+        return send
+
+    def moved(self, SensorID, value, last):
+        change = abs(value - last)
+        if self.band[SensorID] and change > self.band[SensorID]:
+            return True
+        if self.pct[SensorID] and change > abs(last) * self.pct[SensorID] / 100:
+            return True
+        return False
+
+    def stats(self):
+        total = self.sent + self.suppressed
+        return {
+            'sent': self.sent,
+            'suppressed': self.suppressed,
+            'saved_pct': round(100 * self.suppressed / total, 1) if total else 0,
+        }
@@ -1,42 +1,287 @@
 # General-purpose library for communicating with a Domoticz Server (Raspberry Pi Pico version)
 #
-# Last changed: 05/01/2025 10:16
-# Last change: Added date & time of last change
+# Last changed: 18/10/2026 09:00
+# Last change: An update answered with "status" : "ERR" (HTTP 200) counts as rejected
+#
+# The connection to the server is kept open between calls and the udevice
+# requests for all sensors are pipelined - written in one go, then the
+# responses are read back. If the server has dropped the kept open connection
+# it is re-opened and the outstanding requests sent again (once).
+#
+# Uploads stay on the server that last worked. A server that fails is
+# skipped until Probe() (run in the background) can connect to it again,
+# with the time between probes doubling after each failure.
+#
+# Upload() returns "OK", Rejected if the server answered but refused some of
+# the updates (e.g. an unknown idx - these are not worth sending again), or
+# another error if no server could be reached. Domoticz answers a bad update
+# with HTTP 200 and "status" : "ERR" in the JSON, so the body of each response
+# is checked as well as the HTTP status.
 
-import urequests as requests
+import socket
+import time
+
+import metrics
 
 IP_AddressB = '192.168.1.31'
 IP_AddressA = '192.168.1.32'
 port = '8085'
 
-# Function to log data to Domoticz server...
-def LogToDomoticz(idx, SensorVal):
-    urlA = 'http://' + IP_AddressA + ':' + port + '/json.htm?type=command&param=udevice&nvalue=0&idx='+idx+'&svalue='+str(SensorVal)
-    urlB = 'http://' + IP_AddressB + ':' + port + '/json.htm?type=command&param=udevice&nvalue=0&idx='+idx+'&svalue='+str(SensorVal)
-
-    try:
-        request = requests.get(urlA)
-        request.close()
-        response = "OK"
-    except:
+# Socket timeouts in seconds
+Timeout = 5
+ProbeTimeout = 2
+
+# Time between probes of a failed server (ms), doubles after each failure up to BackoffMax
+BackoffMin = 5000
+BackoffMax = 300000
+
+# Status returned by Upload() when the server was reached but refused some updates
+Rejected = "Error: (Request rejected)"
+
+# Request templates...
+_REQ_HEAD = b'GET /json.htm?type=command&param=udevice&idx='
+_REQ_NVALUE = b'&nvalue='
+_REQ_SVALUE = b'&svalue='
+_REQ_TAIL = b' HTTP/1.1\r\nHost: %s:%s\r\nConnection: keep-alive\r\n\r\n'
+
+# Persistent HTTP/1.1 connection to one Domoticz server...
+class Connection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = int(port)
+        self.addr = None
+        self.sock = None
+        self.stream = None
+        self.tail = _REQ_TAIL % (host.encode(), str(port).encode())
+        self.req = bytearray(256)
+        self.refused = False     # Last response had "status" : "ERR"
+        self.healthy = True
+        self.failures = 0        # Consecutive failures
+        self.latency_ms = 0      # Average time taken by an upload
+        self.next_probe = 0      # ticks_ms when a failed server may be tried again
+
+    def connect(self, timeout=Timeout):
+        if self.addr is None:
+            self.addr = socket.getaddrinfo(self.host, self.port)[0][-1]
+        self.sock = socket.socket()
+        self.sock.settimeout(timeout)
         try:
-            request = requests.get(urlB)
-            request.close()
-            response = "OK"
+            self.sock.connect(self.addr)
         except:
-            response = "Error: (Unable to process request)"
+            self.close()
+            raise
+        self.sock.settimeout(Timeout)
+        self.stream = self.sock.makefile('rb')
 
-    return response
+    # Record a failure and when the server should next be probed
+    def failed(self):
+        self.close()
+        self.healthy = False
+        self.failures += 1
+        backoff = min(BackoffMin << min(self.failures - 1, 16), BackoffMax)
+        self.next_probe = time.ticks_add(time.ticks_ms(), backoff)
 
-def LogToDomoticz2(idx, SensorVal1, SensorVal2):
-    url = 'http://' + IP_AddressA + ':' + port + '/json.htm?type=command&param=udevice&nvalue=0&idx='+idx+'&svalue='+str(SensorVal1)+';'+str(SensorVal2)
+    def succeeded(self, ms):
+        self.healthy = True
+        self.failures = 0
+        self.latency_ms = ms if self.latency_ms == 0 else (3 * self.latency_ms + ms) // 4
+
+    def probe_due(self):
+        return not self.healthy and time.ticks_diff(time.ticks_ms(), self.next_probe) >= 0
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'healthy': self.healthy,
+            'failures': self.failures,
+            'latency_ms': self.latency_ms,
+        }
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except:
+                pass
+        self.sock = None
+        self.stream = None
+
+    # Send udevice updates for [(idx, svalue), ...]
+    # Returns (number accepted, number answered) - if the server closes the
+    # connection part way through, the unanswered requests can be sent again
+    def send(self, items):
+        req = self.req
+        req[:] = b''
+        for item in items:
+            req.extend(_REQ_HEAD)
+            req.extend(item[0].encode())
+            req.extend(_REQ_NVALUE)
+            req.extend(str(item[2]).encode() if len(item) > 2 else b'0')
+            req.extend(_REQ_SVALUE)
+            req.extend(item[1].encode())
+            req.extend(self.tail)
+
+        if self.sock is None:
+            self.connect()
+        self.sock.sendall(req)
+
+        ok = 0
+        for answered in range(len(items)):
+            status = self.response()
+            if status is None:
+                self.close()
+                return ok, answered
+            if status == 200 and not self.refused:
+                ok += 1
+        return ok, len(items)
 
-    try:
-        request = requests.get(url)
-        request.close()
+    # Read one response, returns the HTTP status code (None if the connection was closed)
+    # self.refused is set if the JSON status in the body is ERR
+    def response(self):
+        if self.stream is None:
+            return None
+        line = self.stream.readline()
+        if not line:
+            return None
+        status = int(line.split(None, 2)[1])
+        length = 0
+        chunked = False
+        close = False
+        while True:
+            line = self.stream.readline()
+            if not line or line == b'\r\n':
+                break
+            line = line.lower()
+            if line.startswith(b'content-length:'):
+                length = int(line[15:])
+            elif line.startswith(b'transfer-encoding:') and b'chunked' in line:
+                chunked = True
+            elif line.startswith(b'connection:') and b'close' in line:
+                close = True
 
+        self.refused = False
+        if chunked:
+            while True:
+                size = int(self.stream.readline().split(b';')[0], 16)
+                self._skip(size + 2)
+                if size == 0:
+                    break
+        else:
+            self._skip(length)
+
+        if close:
+            self.close()
+        return status
+
+    # Read & discard length bytes of the body, noting an "ERR" status
+    def _skip(self, length):
+        while length > 0:
+            data = self.stream.read(length)
+            if not data:
+                raise OSError('Connection closed')
+            if b'"ERR"' in data:
+                self.refused = True
+            length -= len(data)
+
+
+Servers = [Connection(IP_AddressA, port), Connection(IP_AddressB, port)]
+Active = 0    # Index of the server in use
+
+# Function to send a list of [(idx, svalue), ...] updates to one server...
+# Returns None if the server could not be reached
+# A connection that was already open is retried once (the server may have closed
+# it while idle), a new connection that fails is not - its connect timeout has
+# already been waited for
+def _Send(conn, items):
+    pending = items
+    rejected = 0
+    retried = False
+    while pending:
+        reused = conn.sock is not None
+        try:
+            ok, answered = conn.send(pending)
+        except:
+            conn.close()
+            ok = answered = 0
+        if answered == 0:
+            if retried or not reused:
+                break
+            retried = True
+            continue
+        rejected += answered - ok
+        pending = pending[answered:]
+    if pending:
+        return None
+    if rejected:
+        metrics.inc('domoticz.rejected', rejected)
+        return Rejected
+    return "OK"
+
+# Function to encode text for use in a URL (e.g. an Alert device's svalue)...
+def Quote(text):
+    out = ''
+    for c in text:
+        if c.isalpha() or c.isdigit() or c in '-_.~':
+            out += c
+        else:
+            for b in c.encode():
+                out += '%%%02X' % b
+    return out
+
+# Function to send a list of [(idx, svalue), ...] updates...
+# An update can also be (idx, svalue, nvalue), nvalue is 0 otherwise
+# The active server is tried first, then any other healthy server. Failed
+# servers are left to Probe(), so an upload never waits for a connect timeout
+# to a server that is known to be down.
+UploadTime = metrics.histogram('domoticz.upload')
+
+def Upload(items):
+    global Active
+    if not items:
+        return "OK"
+    for i in [Active] + [i for i in range(len(Servers)) if i != Active]:
+        conn = Servers[i]
+        if not conn.healthy:
+            continue
+        t = metrics.start()
+        response = _Send(conn, items)
+        us = metrics.stop(UploadTime, t)
+        if response is None:
+            conn.failed()
+            metrics.inc('domoticz.failed')
+            continue
+        conn.succeeded(us // 1000)
+        if i != Active:
+            metrics.inc('domoticz.failover')
+        Active = i
+        metrics.inc('domoticz.updates', len(items))
+        return response
+
+    metrics.inc('domoticz.unsent', len(items))
+    return "Error: (Unable to process request)"
+
+# Function to check whether failed servers can be reached again (run in the background)...
+def Probe():
+    for conn in Servers:
+        if conn.probe_due():
+            t = time.ticks_ms()
+            try:
+                conn.connect(ProbeTimeout)
+                conn.succeeded(time.ticks_diff(time.ticks_ms(), t))
+            except:
+                conn.failed()
+
+def Stats():
+    return [conn.stats() for conn in Servers]
+
+# Function to log data to Domoticz server...
+def LogToDomoticz(idx, SensorVal):
+    return Upload([(idx, str(SensorVal))])
+
+def LogToDomoticz2(idx, SensorVal1, SensorVal2):
+    if Upload([(idx, str(SensorVal1) + ';' + str(SensorVal2))]) == "OK":
         response = "Request sent!"
-    except:
+    else:
         response = "Error: Unable to process request)"
 
     return response
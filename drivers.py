@@ -0,0 +1,566 @@
+# Sensor drivers for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 09:15
+# Last change: Viper / native buffer functions moved to fastbuf.py (imported only if they compile)
+#
+# Build() runs once at startup and turns the SensorName / SensorType /
+# SensorLoc / Sensor_A/B/C arrays in sensors.py into a list of driver
+# objects. Each measurement tick calls start() on every driver, then
+# read() on each one once its delay (ms) has passed.
+#
+# To add a new sensor type, write a Driver subclass with a read() method
+# (returns the value, raises an exception if the sensor did not respond)
+# and add it to Registry.
+# Libraries needed by only one sensor type are imported by its driver, so
+# they use no RAM unless that type is configured.
+#
+# Each driver keeps track of its own health. After sensors.SensorRetries
+# failures in a row (a read that raised an exception or took longer than its
+# time budget) the sensor is only retried after a backoff time, doubling up
+# to sensors.SensorBackoffMax, and is reported as unavailable (None) until it
+# responds again.
+
+import machine
+import array
+import time
+import ubinascii
+import sensors
+
+# Raspberry Pi PICO ADC calibration (3.3V)
+conversion_factor = 3.3 / (65535)
+
+
+# Base class for all sensor drivers...
+class Driver:
+    __slots__ = ('id', 'num', 'name', 'idx', 'chan', 'budget', 'failures', 'next_try', 'read_us')
+    label = 'Sensor'
+    counter = False                              # Value is an event count that can be reset
+    reset_on_log = False                         # Reset the count after every log entry
+    delay = 0                                    # ms needed between start() and read()
+    channels = 1                                 # Number of values returned by read()
+    read_budget = 20                             # Default time allowed for read() (ms)
+
+    def __init__(self, SensorID, num):
+        self.id = SensorID                       # Index into the sensors.py arrays
+        self.num = num                           # Index amongst sensors of the same label
+        self.name = sensors.SensorName[SensorID]
+        self.idx = sensors.DomoticzIDX[SensorID]
+        self.chan = 0                            # First channel (set by Build)
+        self.budget = (sensors.ReadBudget[SensorID] or self.read_budget) * 1000  # us
+        self.failures = 0                        # Failures in a row
+        self.next_try = 0                        # ticks_ms when a failed sensor is next tried
+        self.read_us = 0                         # Average read time (us)
+
+    def tag(self):
+        return self.label + '[' + str(self.num) + ']'
+
+    # True if the sensor is responding (False once it has failed SensorRetries times in a row)
+    def available(self):
+        return self.failures < sensors.SensorRetries
+
+    # True if the sensor should be read now (a failed sensor only once its backoff time has passed)
+    def due(self, now):
+        return self.available() or time.ticks_diff(now, self.next_try) >= 0
+
+    # Record a read that failed, returns True if the sensor has just become unavailable
+    def failed(self, now):
+        self.failures += 1
+        if self.failures < sensors.SensorRetries:
+            return False
+        backoff = sensors.MeasurementInterval * 1000 << min(self.failures - sensors.SensorRetries, 16)
+        self.next_try = time.ticks_add(now, min(backoff, sensors.SensorBackoffMax * 1000))
+        return self.failures == sensors.SensorRetries
+
+    # Record a read that took us microseconds, returns False if it was over budget (counted as a failure)
+    def succeeded(self, us, now):
+        self.read_us = us if self.read_us == 0 else (3 * self.read_us + us) // 4
+        if us > self.budget:
+            self.failed(now)
+            return False
+        self.failures = 0
+        return True
+
+    # Start a measurement (e.g. a 1-wire temperature conversion)
+    def start(self):
+        pass
+
+    # Called after the value n has been logged (counters reset here)
+    def reset(self, n):
+        pass
+
+
+# Functions to sum / find the largest of the first n samples in an array('H'), the sum
+# of the squared differences from the mean & the calibration polynomial (Horner's rule,
+# coefficients highest power first)...
+# Compiled to machine code (fastbuf.py) where the firmware has the viper & native
+# emitters, plain Python otherwise (fastbuf.py does not compile without them)
+try:
+    from fastbuf import BufSum, BufMax, BufSumSq, Horner
+except Exception:
+    def BufSum(buf, n):
+        total = 0
+        for i in range(n):
+            total += buf[i]
+        return total
+
+    def BufMax(buf, n):
+        top = 0
+        for i in range(n):
+            if buf[i] > top:
+                top = buf[i]
+        return top
+
+    def BufSumSq(buf, n, mean):
+        total = 0.0
+        for i in range(n):
+            d = buf[i] - mean
+            total += d * d
+        return total
+
+    def Horner(coeffs, v):
+        y = 0.0
+        for k in coeffs:
+            y = y * v + k
+        return y
+
+# Largest burst (samples) for an Analogue sensor
+ADCMaxSamples = 4096
+
+
+# ADC reading, Output = Ax^2 + Bx + C
+# With sensors.ADCSamples > 1 each reading is a burst of samples taken at
+# sensors.ADCRate into a preallocated array, giving the mean (less noise,
+# better resolution), the AC RMS (about the mean) or the peak sample, see
+# sensors.ADCMode. The calibration is applied to the result, except that an
+# RMS (which has no offset) is only multiplied by the gain B.
+class Analogue(Driver):
+    __slots__ = ('adc', 'cal', 'buf', 'samples', 'period', 'mode')
+    label = 'Alg'
+    read_budget = 2
+
+    def __init__(self, SensorID, num, ctx):
+        super().__init__(SensorID, num)
+        self.adc = machine.ADC(sensors.SensorLoc[SensorID])
+        self.cal = array.array('f', (sensors.Sensor_A[SensorID], sensors.Sensor_B[SensorID], sensors.Sensor_C[SensorID]))
+        self.samples = max(1, min(sensors.ADCSamples[SensorID], ADCMaxSamples))
+        self.buf = array.array('H', [0] * self.samples)
+        self.period = 1000000 // sensors.ADCRate if sensors.ADCRate > 0 else 0  # us between samples
+        self.mode = sensors.ADCMode[SensorID]
+        if not sensors.ReadBudget[SensorID]:
+            self.budget += self.samples * self.period
+
+    # Take a burst of samples into buf
+    def burst(self):
+        buf = self.buf
+        read = self.adc.read_u16
+        period = self.period
+        t = time.ticks_us()
+        for i in range(self.samples):
+            buf[i] = read()
+            if period:
+                t = time.ticks_add(t, period)
+                wait = time.ticks_diff(t, time.ticks_us())
+                if wait > 0:
+                    time.sleep_us(wait)
+
+    def read(self):
+        if self.samples == 1:
+            return Horner(self.cal, conversion_factor * self.adc.read_u16())
+        self.burst()
+        n = self.samples
+        mean = BufSum(self.buf, n) / n
+        if self.mode == 'rms':
+            return self.cal[1] * conversion_factor * (BufSumSq(self.buf, n, mean) / n) ** 0.5
+        if self.mode == 'peak':
+            v = BufMax(self.buf, n)
+        else:
+            v = mean
+        return Horner(self.cal, conversion_factor * v)
+
+
+# DSxx one-wire temperature sensor
+# There is one bus per pin. The first sensor on each bus starts the
+# conversion on the whole bus, each sensor is then read once the conversion
+# time for its resolution has passed. ROMs are assigned by AssignRoms().
+class T1w(Driver):
+    __slots__ = ('pin', 'bus', 'rom', 'first', 'delay')
+    label = 'T1w'
+    read_budget = 30
+
+    def __init__(self, SensorID, num, ctx):
+        super().__init__(SensorID, num)
+        buses = ctx.setdefault('T1w', {})
+        self.pin = sensors.SensorLoc[SensorID]
+        self.first = self.pin not in buses
+        if self.first:
+            import onewire
+            import ds18x20
+            buses[self.pin] = ds18x20.DS18X20(onewire.OneWire(machine.Pin(self.pin)))
+        self.bus = buses[self.pin]
+        self.rom = None
+        self.delay = T1wConversionTime[12]
+
+    # Set the resolution (9 - 12 bits) if the device supports it
+    # Returns False if the device did not respond (it is then left at the 12 bit conversion time)
+    def resolution(self, bits):
+        if self.rom[0] not in (0x22, 0x28, 0x3B):  # DS18S20 is fixed resolution
+            return True
+        bits = min(max(bits, 9), 12)
+        try:
+            scratch = self.bus.read_scratch(self.rom)
+            config = ((bits - 9) << 5) | 0x1F
+            if scratch[4] != config:
+                self.bus.write_scratch(self.rom, bytearray((scratch[2], scratch[3], config)))
+        except Exception:
+            # CRC error (no device answering reads all 0xFF) or OneWireError (no devices on the bus)
+            self.delay = T1wConversionTime[12]
+            return False
+        self.delay = T1wConversionTime[bits]
+        return True
+
+    def start(self):
+        if self.first:
+            self.bus.convert_temp()
+
+    def read(self):
+        return round(self.bus.read_temp(self.rom), 1)
+
+# DSxx conversion time (ms) for each resolution (bits)
+T1wConversionTime = {9: 94, 10: 188, 11: 375, 12: 750}
+
+# File used to remember which ROM belongs to which sensor
+# Delete this file to force a rescan of all the 1-wire buses
+T1wRomFile = 't1w_roms.json'
+
+# Function to assign a ROM to each T1w sensor...
+# Sensors found in T1wRomFile keep their ROM (so they keep their identity
+# when a probe is added or removed) and the buses are only scanned if
+# there are sensors without a ROM.
+def AssignRoms(T1w_drivers, buses, log):
+    import json
+    try:
+        with open(T1wRomFile) as f:
+            saved = json.load(f)
+    except:
+        saved = {}
+
+    missing = []
+    for d in T1w_drivers:
+        entry = saved.get(d.name)
+        if entry and entry[0] == d.pin:
+            d.rom = bytearray(ubinascii.unhexlify(entry[1]))
+        else:
+            missing.append(d)
+
+    if missing:
+        used = [bytes(d.rom) for d in T1w_drivers if d.rom is not None]
+        for pin in buses:
+            waiting = [d for d in missing if d.pin == pin]
+            if not waiting:
+                continue
+            roms = [rom for rom in buses[pin].scan() if bytes(rom) not in used]
+            log('Found ' + str(len(roms)) + ' new DSxx 1-wire device(s) on pin ' + str(pin))
+            for d in waiting:
+                if roms:
+                    d.rom = roms.pop(0)
+                    used.append(bytes(d.rom))
+            for rom in roms:
+                log('Unused DSxx 1-wire device: ' + ubinascii.hexlify(rom).decode(), 1, 0)
+
+        saved = {}
+        for d in T1w_drivers:
+            if d.rom is not None:
+                saved[d.name] = [d.pin, ubinascii.hexlify(d.rom).decode()]
+        try:
+            with open(T1wRomFile, 'w') as f:
+                json.dump(saved, f)
+        except:
+            log('Unable to save ' + T1wRomFile, 1, 0)
+
+    for d in T1w_drivers:
+        if d.rom is None:
+            log(d.tag() + ' (' + d.name + ') has no DSxx 1-wire device', 1, 0)
+        elif d.resolution(sensors.T1wResolution[d.id]):
+            log(d.tag() + ' (' + d.name + '): ' + ubinascii.hexlify(d.rom).decode())
+        else:
+            # Keeps its ROM (the probe may be refitted), reads fail & back off until it answers
+            log(d.tag() + ' (' + d.name + ') has no DSxx 1-wire device (' + ubinascii.hexlify(d.rom).decode() + ' did not respond)', 1, 0)
+
+
+# Minimum time between DHT measurements (ms), the sensor does not answer if read more often
+DHTMinInterval = {'DHT11': 1000, 'DHT22': 2000}
+
+# One DHT11 / DHT22 device, shared by all the DHT sensors on its pin
+# (e.g. DHT22_T and DHT22_H on the same pin). The result of a measurement,
+# or its failure, is re-used until the minimum interval has passed, so the
+# device is only measured once per tick.
+class DHTDevice:
+    __slots__ = ('dev', 'interval', 'last', 'error', 't', 'h', 'measures')
+
+    def __init__(self, pin, model):
+        import dht
+        self.dev = getattr(dht, model)(machine.Pin(pin))
+        self.interval = DHTMinInterval[model]
+        self.last = None                         # ticks_ms of the last measurement
+        self.error = None                        # Exception raised by the last measurement
+        self.t = None
+        self.h = None
+        self.measures = 0
+
+    def measure(self):
+        now = time.ticks_ms()
+        if self.last is None or time.ticks_diff(now, self.last) >= self.interval:
+            self.last = now
+            self.measures += 1
+            try:
+                self.dev.measure()
+                self.t = self.dev.temperature()
+                self.h = self.dev.humidity()
+                self.error = None
+            except Exception as e:
+                self.error = e
+        if self.error is not None:
+            raise self.error
+
+
+# DHT11 / DHT22 temperature ('T'), humidity ('H') or both ('TH')
+class DHT(Driver):
+    __slots__ = ('dev', 'model', 'mode', 'channels')
+    read_budget = 50
+
+    def __init__(self, SensorID, num, ctx, model, mode):
+        super().__init__(SensorID, num)
+        pin = sensors.SensorLoc[SensorID]
+        devices = ctx.setdefault('DHT', {})
+        if pin not in devices:
+            devices[pin] = DHTDevice(pin, model)
+        self.dev = devices[pin]
+        self.model = model
+        self.mode = mode
+        self.channels = len(mode)
+
+    def tag(self):
+        return self.model + '[' + str(self.num) + ']_' + self.mode
+
+    def read(self):
+        self.dev.measure()
+        if self.mode == 'T':
+            return self.dev.t
+        if self.mode == 'H':
+            return self.dev.h
+        return (self.dev.t, self.dev.h)
+
+
+# Edge event counter (base class for PIR, IOR & Counter sensors)
+# Each pin has its own hard IRQ handler. The handler only adds one to the
+# count in a preallocated array and, if PulseLog is set, records the
+# ticks_us time of the edge in a preallocated ring buffer, so edges are
+# never lost between measurements and nothing is allocated in the IRQ.
+class Pulse(Driver):
+    __slots__ = ('pin', 'counts', 'stamps', 'mask', 'base', 'last', 'drained', 'out', 'stats_ms', 'stats_count')
+    counter = True
+    trigger = 'IRQ_RISING'
+    read_budget = 2
+
+    def __init__(self, SensorID, num, ctx):
+        super().__init__(SensorID, num)
+        self.counts = array.array('L', [0])     # Total number of edges (written by the IRQ handler)
+        self.base = 0                            # Count when last reset
+        self.last = 0                            # Count when last read
+        self.stats_ms = time.ticks_ms()
+        self.stats_count = 0
+
+        # Ring buffer of edge times (size rounded up to a power of 2)
+        size = 1
+        while size < sensors.PulseLog:
+            size <<= 1
+        self.stamps = array.array('L', [0] * size) if sensors.PulseLog > 0 else None
+        self.out = array.array('L', [0] * size) if sensors.PulseLog > 0 else None
+        self.mask = size - 1
+        self.drained = 0                         # Count up to which the ring buffer has been read
+
+        self.pin = machine.Pin(sensors.SensorLoc[SensorID], machine.Pin.IN)
+        handler = self.callback if self.stamps is None else self.callback_log
+        self.pin.irq(trigger=getattr(machine.Pin, self.trigger), handler=handler, hard=True)
+
+    def callback(self, pin):
+        self.counts[0] += 1
+
+    def callback_log(self, pin):
+        c = self.counts
+        self.stamps[c[0] & self.mask] = time.ticks_us()
+        c[0] += 1
+
+    def read(self):
+        self.last = self.counts[0]
+        return self.last - self.base
+
+    # Take the n edges that have been logged off the count
+    # (edges read since then - e.g. by core 1 while the upload was sent - are kept)
+    def reset(self, n):
+        self.base += n
+
+    # Copy the edge times recorded since the last drain into self.out (oldest first)
+    # Returns (number copied, number lost because the ring buffer overflowed)
+    def drain(self):
+        if self.stamps is None:
+            return 0, 0
+        state = machine.disable_irq()
+        count = self.counts[0]
+        n = count - self.drained
+        lost = 0
+        if n > len(self.stamps):
+            lost = n - len(self.stamps)
+            n = len(self.stamps)
+        start = count - n
+        for i in range(n):
+            self.out[i] = self.stamps[(start + i) & self.mask]
+        machine.enable_irq(state)
+        self.drained = count
+        return n, lost
+
+    # Event rate and time between edges since the last call
+    def stats(self):
+        now = time.ticks_ms()
+        count = self.counts[0]
+        ms = time.ticks_diff(now, self.stats_ms)
+        result = {
+            'count': count,
+            'rate_per_min': round(60000 * (count - self.stats_count) / ms, 2) if ms > 0 else 0,
+        }
+        self.stats_ms = now
+        self.stats_count = count
+
+        n, lost = self.drain()
+        if n > 1:
+            gap_min = None
+            gap_total = 0
+            for i in range(1, n):
+                gap = time.ticks_diff(self.out[i], self.out[i - 1])
+                gap_total += gap
+                if gap_min is None or gap < gap_min:
+                    gap_min = gap
+            result['gap_avg_ms'] = round(gap_total / (n - 1) / 1000, 1)
+            result['gap_min_ms'] = round(gap_min / 1000, 1)
+        if lost:
+            result['lost_times'] = lost
+        return result
+
+
+# Rising edge IO sensor
+class IOR(Pulse):
+    __slots__ = ()
+    label = 'IOR'
+
+
+# Passive Infrared sensor / motion sensor
+class PIR(Pulse):
+    __slots__ = ()
+    label = 'PIR'
+    reset_on_log = True
+
+
+# Rising-Edge IO pulse counter (non-resetting)
+class Counter_R(Pulse):
+    __slots__ = ()
+    label = 'Counter_R'
+    counter = False
+
+
+# Falling-Edge IO pulse counter (non-resetting)
+class Counter_F(Pulse):
+    __slots__ = ()
+    label = 'Counter_F'
+    counter = False
+    trigger = 'IRQ_FALLING'
+
+
+# Sensor types supported, SensorType: (driver class, extra arguments)
+Registry = {
+    'Analogue': (Analogue, ()),
+    'T1w': (T1w, ()),
+    'DHT11_T': (DHT, ('DHT11', 'T')),
+    'DHT11_H': (DHT, ('DHT11', 'H')),
+    'DHT11_TH': (DHT, ('DHT11', 'TH')),
+    'DHT22_T': (DHT, ('DHT22', 'T')),
+    'DHT22_H': (DHT, ('DHT22', 'H')),
+    'DHT22_TH': (DHT, ('DHT22', 'TH')),
+    'IOR': (IOR, ()),
+    'PIR': (PIR, ()),
+    'Counter_R': (Counter_R, ()),
+    'Counter_F': (Counter_F, ()),
+}
+
+# Function to build the list of drivers from sensors.py...
+def Build(log):
+    Drivers = []
+    ctx = {}
+    found = {}
+    for SensorID in range(sensors.ActiveSensors):
+        SensorType = sensors.SensorType[SensorID]
+        if SensorType not in Registry:
+            log('Sensor type ' + SensorType + ' is not supported (' + sensors.SensorName[SensorID] + ')', 1, 0)
+            continue
+        cls, args = Registry[SensorType]
+        num = found.get(cls, 0)
+        Drivers.append(cls(SensorID, num, ctx, *args))
+        found[cls] = num + 1
+
+    for cls in found:
+        log('Found ' + str(found[cls]) + ' ' + cls.__name__ + ' sensor(s)')
+    chan = 0
+    for d in Drivers:
+        d.chan = chan
+        chan += d.channels
+
+    if 'T1w' in ctx:
+        AssignRoms([d for d in Drivers if isinstance(d, T1w)], ctx['T1w'], log)
+    return Drivers
+
+# Function to group drivers by delay, returns [(delay, [drivers]), ...] in delay order...
+def Phases(Drivers):
+    delays = sorted(set([d.delay for d in Drivers]))
+    return [(delay, [d for d in Drivers if d.delay == delay]) for delay in delays]
+
+# Function to put the sensors in each phase in order of read time (fastest first)...
+# so a slow sensor does not delay the others
+def SortPhases(Phases):
+    for delay, phase in Phases:
+        phase.sort(key=lambda d: d.read_us)
+
+# Function to return the total number of channels...
+def ChannelCount(Drivers):
+    return sum([d.channels for d in Drivers])
+
+# Function to list the names of the channels logged (one per value, T & H pairs give two)...
+def ChannelNames(Drivers):
+    names = []
+    for d in Drivers:
+        if d.channels == 1:
+            names.append(d.name)
+        else:
+            names.append(d.name + '_T')
+            names.append(d.name + '_H')
+    return names
+
+# Function to copy the sensor values into out, one per channel (None if there is no value)...
+def ChannelValues(Drivers, SensorVal, out):
+    i = 0
+    for d in Drivers:
+        v = SensorVal[d.id]
+        if d.channels == 1:
+            out[i] = v
+            i += 1
+        else:
+            for n in range(d.channels):
+                out[i] = v[n] if isinstance(v, tuple) else None
+                i += 1
+    return out
+
+# Function to format a value for logging / uploading (T & H pairs as 'T;H', unavailable as '')
+def FormatValue(value):
+    if value is None:
+        return ''
+    if isinstance(value, tuple):
+        return ';'.join([str(v) for v in value])
+    return str(value)
@@ -0,0 +1,45 @@
+# Machine code versions of the sample buffer functions in drivers.py (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 09:15
+# Last change: First version (moved out of drivers.py)
+#
+# Compiled with the viper & native code emitters. A MicroPython build without
+# them cannot compile this module at all, so drivers.py imports it inside a
+# try and falls back to its plain Python versions if the import fails.
+# n must be below 32768 so the viper sum cannot overflow.
+
+import micropython
+
+# Function to sum the first n samples in an array('H')...
+@micropython.viper
+def BufSum(buf: ptr16, n: int) -> int:
+    total = 0
+    for i in range(n):
+        total += buf[i]
+    return total
+
+# Function to find the largest of the first n samples in an array('H')...
+@micropython.viper
+def BufMax(buf: ptr16, n: int) -> int:
+    top = 0
+    for i in range(n):
+        if buf[i] > top:
+            top = buf[i]
+    return top
+
+# Function to return the sum of the squared differences from mean of the first n samples...
+@micropython.native
+def BufSumSq(buf, n, mean):
+    total = 0.0
+    for i in range(n):
+        d = buf[i] - mean
+        total += d * d
+    return total
+
+# Function to evaluate the calibration polynomial (coefficients highest power first) by Horner's rule...
+@micropython.native
+def Horner(coeffs, v):
+    y = 0.0
+    for k in coeffs:
+        y = y * v + k
+    return y
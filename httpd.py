@@ -0,0 +1,204 @@
+# Status web server for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 06:00
+# Last change: No allocation per request, idle clients are timed out
+#
+# A small non-blocking HTTP server that answers GET requests with JSON,
+# e.g. the latest sensor values or the runtime metrics.
+# It is run from the scheduler's sleep (Sched.sleep = Server.wait), so
+# requests are answered while the logger would otherwise be idle and a
+# measurement is never delayed by more than one request.
+#
+# Each response is built once and re-sent from the cache until it is
+# MaxAge ms old. Requests are read into a preallocated buffer and the path
+# is matched in place, clients are kept in preallocated slots and poll
+# results are iterated with ipoll, so apart from the socket that accept()
+# returns, answering a request from the cache does not allocate memory.
+# A client that connects but sends nothing is closed after ClientTimeout ms,
+# or sooner if all MaxClients slots are in use when another client connects.
+
+import array
+import json
+import select
+import socket
+import time
+
+_HEAD = b'HTTP/1.0 200 OK\r\nContent-Type: application/json\r\nAccess-Control-Allow-Origin: *\r\nConnection: close\r\nContent-Length: '
+_NOT_FOUND = b'HTTP/1.0 404 Not Found\r\nConnection: close\r\nContent-Length: 0\r\n\r\n'
+
+# Maximum number of clients connected at once (the oldest is closed to make room for another)
+MaxClients = 4
+
+# Time (ms) a cached response is re-used for
+MaxAge = 1000
+
+# Time (ms) a client has to send its request before it is closed
+ClientTimeout = 2000
+
+# Time (s) allowed to send a response
+SendTimeout = 0.5
+
+class Server:
+    def __init__(self, port=80, request_size=512):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(socket.getaddrinfo('0.0.0.0', port)[0][-1])
+        self.sock.listen(MaxClients)
+        self.sock.setblocking(False)
+        self.poller = select.poll()
+        self.poller.register(self.sock, select.POLLIN)
+        # ipoll (MicroPython) re-uses its result tuple, CPython only has poll
+        self.ipoll = self.poller.ipoll if hasattr(self.poller, 'ipoll') else self.poller.poll
+        # File number -> socket (CPython's poll returns file numbers, MicroPython's the socket)
+        self.fds = {self.sock.fileno(): self.sock} if hasattr(self.sock, 'fileno') else {}
+        self.request = bytearray(request_size)    # Receive buffer (shared by all requests)
+        self.clients = [None] * MaxClients        # Client sockets
+        self.opened = array.array('l', [0] * MaxClients)  # ticks_ms when each client connected
+        self.count = 0                            # Number of clients connected
+        self.routes = []                          # [[b'/path', function returning the data, ticks_ms when built, response], ...]
+        self.requests = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    # Serve the result of func() (converted to JSON) at path
+    def route(self, path, func):
+        self.routes.append([path.encode(), func, 0, None])
+
+    # Wait up to ms milliseconds, answering requests meanwhile (used as the scheduler's sleep)
+    def wait(self, ms):
+        end = time.ticks_add(time.ticks_ms(), ms)
+        while True:
+            remaining = time.ticks_diff(end, time.ticks_ms())
+            if remaining <= 0:
+                return
+            if self.count:
+                self._expire()
+                remaining = min(remaining, ClientTimeout)
+            for sock, event in self.ipoll(remaining):
+                sock = self.fds.get(sock, sock)
+                if sock is self.sock:
+                    self._accept()
+                elif event & select.POLLIN:
+                    self._read(sock)
+                else:
+                    self._close(sock)
+
+    def _accept(self):
+        try:
+            client, addr = self.sock.accept()
+        except OSError:
+            return
+        if self.count >= MaxClients:
+            self._expire()
+        if self.count >= MaxClients:
+            # Still full - make room by closing the client that has been connected longest
+            oldest = 0
+            for i in range(1, MaxClients):
+                if time.ticks_diff(self.opened[oldest], self.opened[i]) > 0:
+                    oldest = i
+            self.errors += 1
+            self._close(self.clients[oldest])
+        i = self.clients.index(None)
+        self.clients[i] = client
+        self.opened[i] = time.ticks_ms()
+        self.count += 1
+        client.setblocking(False)
+        if hasattr(client, 'fileno'):
+            self.fds[client.fileno()] = client
+        self.poller.register(client, select.POLLIN)
+
+    # Close clients that have not sent their request within ClientTimeout
+    def _expire(self):
+        now = time.ticks_ms()
+        for i in range(MaxClients):
+            sock = self.clients[i]
+            if sock is not None and time.ticks_diff(now, self.opened[i]) >= ClientTimeout:
+                self.timeouts += 1
+                self._close(sock)
+
+    # Read the request line, send the response & close the connection
+    def _read(self, sock):
+        try:
+            n = sock.readinto(self.request) if hasattr(sock, 'readinto') else sock.recv_into(self.request)
+        except OSError:
+            n = 0
+        if not n:
+            self._close(sock)
+            return
+        self.requests += 1
+        # "GET /path?query HTTP/1.x" - the path is between the first space and the next space or ?
+        req = self.request
+        start = req.find(b' ', 0, n) + 1
+        end = req.find(b' ', start, n) if start else -1
+        if end < 0:
+            end = start
+        query = req.find(b'?', start, end)
+        if query >= 0:
+            end = query
+        response = self._response(start, end)
+        try:
+            # The whole response is written in one go (it is small), giving up after SendTimeout
+            sock.settimeout(SendTimeout)
+            sock.sendall(response)
+        except OSError:
+            self.errors += 1
+        self._close(sock)
+
+    def _close(self, sock):
+        try:
+            self.poller.unregister(sock)
+        except (KeyError, ValueError, OSError):
+            pass
+        if hasattr(sock, 'fileno'):
+            self.fds.pop(sock.fileno(), None)
+        sock.close()
+        for i in range(MaxClients):
+            if self.clients[i] is sock:
+                self.clients[i] = None
+                self.count -= 1
+
+    # Return the route whose path is request[start:end] (compared in place), or None
+    def _route(self, start, end):
+        req = self.request
+        n = end - start
+        for route in self.routes:
+            path = route[0]
+            if len(path) != n:
+                continue
+            i = 0
+            while i < n and req[start + i] == path[i]:
+                i += 1
+            if i == n:
+                return route
+        return None
+
+    # Return the (cached) response for the path at request[start:end]
+    def _response(self, start, end):
+        route = self._route(start, end)
+        if route is None:
+            return _NOT_FOUND
+        now = time.ticks_ms()
+        if route[3] is None or time.ticks_diff(now, route[2]) >= MaxAge:
+            try:
+                body = json.dumps(route[1]()).encode()
+            except Exception as e:
+                self.errors += 1
+                body = json.dumps({'error': str(e)}).encode()
+            route[2] = now
+            route[3] = _HEAD + str(len(body)).encode() + b'\r\n\r\n' + body
+        return route[3]
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'timeouts': self.timeouts,
+            'clients': self.count,
+        }
+
+    def close(self):
+        for sock in self.clients:
+            if sock is not None:
+                self._close(sock)
+        self.poller.unregister(self.sock)
+        self.sock.close()
@@ -1,5 +1,6 @@
 from micropython import const
 import io
+import os
 import sys
 import time
 
@@ -55,6 +56,9 @@ class Handler:
     def format(self, record):
         return self.formatter.format(record)
 
+    def flush(self):
+        pass
+
 
 class StreamHandler(Handler):
     def __init__(self, stream=None):
@@ -79,6 +83,167 @@ class FileHandler(StreamHandler):
         self.stream.close()
 
 
+class BufferedFileHandler(Handler):
+    # Collects formatted records in a preallocated buffer and writes them to
+    # the file in one go when the buffer is full, when flush_interval (ms)
+    # has passed, or when a record at flush_level or above is logged.
+    def __init__(self, filename, mode="a", encoding="UTF-8", size=1024, flush_interval=60000, flush_level=ERROR):
+        super().__init__()
+        self.terminator = "\n"
+        self.encoding = encoding
+        self.stream = open(filename, mode=mode + "b")
+        self.buf = bytearray(size)
+        self.mv = memoryview(self.buf)
+        self.pos = 0
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.last_flush = time.ticks_ms()
+        self.flushes = 0
+        self.flush_ms = 0
+        self.flush_ms_max = 0
+
+    def emit(self, record):
+        if record.levelno >= self.level:
+            self.write((self.format(record) + self.terminator).encode(self.encoding), record)
+
+    def write(self, data, record):
+        n = len(data)
+        if self.pos + n > len(self.buf):
+            self.flush()
+        if n > len(self.buf):
+            self.stream.write(data)
+        else:
+            self.mv[self.pos : self.pos + n] = data
+            self.pos += n
+        if record.levelno >= self.flush_level:
+            self.flush()
+        else:
+            self.poll()
+
+    # Flush if flush_interval has passed (call this periodically)
+    def poll(self):
+        if self.pos and time.ticks_diff(time.ticks_ms(), self.last_flush) >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        t = time.ticks_ms()
+        if self.pos:
+            self.stream.write(self.mv[: self.pos])
+            self.pos = 0
+        self.stream.flush()
+        self.last_flush = time.ticks_ms()
+        ms = time.ticks_diff(self.last_flush, t)
+        self.flushes += 1
+        self.flush_ms += ms
+        if ms > self.flush_ms_max:
+            self.flush_ms_max = ms
+
+    def stats(self):
+        return {
+            "flushes": self.flushes,
+            "flush_ms_avg": round(self.flush_ms / self.flushes, 1) if self.flushes else 0,
+            "flush_ms_max": self.flush_ms_max,
+            "buffered": self.pos,
+        }
+
+    def close(self):
+        self.flush()
+        self.stream.close()
+
+
+class RotatingFileHandler(BufferedFileHandler):
+    # Starts a new file when the current one would exceed maxBytes, keeping
+    # backupCount old files (filename.1 is the newest). Every index_interval
+    # bytes a "timestamp,offset" checkpoint is added to filename.idx so a
+    # time range can be found without reading the whole file (see seek_time()).
+    # A new .idx file starts with an "epoch,year" line - the timestamps are the
+    # device's time.time(), which counts from 2000 on some ports, not 1970.
+    # If header is set (a message, e.g. CSV column titles) it is logged at the
+    # start of every new file.
+    def __init__(self, filename, mode="a", encoding="UTF-8", maxBytes=65536, backupCount=3, index_interval=4096, **kwargs):
+        super().__init__(filename, mode, encoding, **kwargs)
+        self.filename = filename
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.index_interval = index_interval
+        self.stream.seek(0, 2)
+        self.size = self.stream.tell()
+        self.next_index = self.size
+        self.open_index(mode)
+        self.header = None
+
+    # Open filename.idx, writing the epoch year first if the file is new
+    def open_index(self, mode):
+        try:
+            new = mode[0] == "w" or os.stat(self.filename + ".idx")[6] == 0
+        except OSError:
+            new = True
+        self.index = open(self.filename + ".idx", mode)
+        if new:
+            self.index.write("epoch,%d\n" % time.gmtime(0)[0])
+
+    def write(self, data, record):
+        n = len(data)
+        if self.maxBytes and self.size and self.size + n > self.maxBytes:
+            self.rotate()
+        if self.size >= self.next_index:
+            self.index.write("%d,%d\n" % (record.ct, self.size))
+            self.next_index = self.size + self.index_interval
+        self.size += n
+        super().write(data, record)
+
+    def rotate(self):
+        self.flush()
+        self.stream.close()
+        self.index.close()
+        for ext in ("", ".idx"):
+            names = [self.filename + ext] + [self.filename + "." + str(i) + ext for i in range(1, self.backupCount + 1)]
+            try:
+                os.remove(names[-1])
+            except OSError:
+                pass
+            for i in range(len(names) - 2, -1, -1):
+                try:
+                    os.rename(names[i], names[i + 1])
+                except OSError:
+                    pass
+        self.stream = open(self.filename, "wb")
+        self.open_index("w")
+        self.size = 0
+        self.next_index = 0
+        if self.header is not None:
+            record = LogRecord()
+            record.set("root", INFO, self.header)
+            data = (self.format(record) + self.terminator).encode(self.encoding)
+            self.stream.write(data)
+            self.size = len(data)
+
+    def flush(self):
+        super().flush()
+        self.index.flush()
+
+    def close(self):
+        super().close()
+        self.index.close()
+
+
+# Return the offset in filename to start reading from to find records logged at or after ts
+def seek_time(filename, ts):
+    offset = 0
+    try:
+        with open(filename + ".idx") as f:
+            for line in f:
+                t, o = line.split(",")
+                if t == "epoch":
+                    continue
+                if int(t) > ts:
+                    break
+                offset = int(o)
+    except OSError:
+        pass
+    return offset
+
+
 class Formatter:
     def __init__(self, fmt=None, datefmt=None):
         self.fmt = _default_fmt if fmt is None else fmt
@@ -225,6 +390,7 @@ def basicConfig(
     stream=None,
     encoding="UTF-8",
     force=False,
+    handlers=None,
 ):
     if "root" not in _loggers:
         _loggers["root"] = Logger("root")
@@ -236,16 +402,19 @@ def basicConfig(
             h.close()
         logger.handlers = []
 
-        if filename is None:
-            handler = StreamHandler(stream)
-        else:
-            handler = FileHandler(filename, filemode, encoding)
+        if handlers is None:
+            if filename is None:
+                handlers = [StreamHandler(stream)]
+            else:
+                handlers = [FileHandler(filename, filemode, encoding)]
 
-        handler.setLevel(level)
-        handler.setFormatter(Formatter(format, datefmt))
+        for handler in handlers:
+            handler.setLevel(level)
+            if handler.formatter is None:
+                handler.setFormatter(Formatter(format, datefmt))
+            logger.addHandler(handler)
 
         logger.setLevel(level)
-        logger.addHandler(handler)
 
 
 if hasattr(sys, "atexit"):
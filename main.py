@@ -4,33 +4,37 @@
 #          DHTxx 1-wire temperature / humidity sensors
 #          PIR sensors
 #
-# Last changed: 26/05/2025 10:16
-# Last change: Added date & time of last change
-#              Updating to match other modules
+# Last changed: 18/10/2026 08:45
+# Last change: Dual core - the first measurement boot mark is recorded on core 0 (from an event)
 
 # To do...
 # Add support for
 #          Simple I/O based event counter (non-resetting)
 #          Simple I/O based daily event counter (resets daily)
-#          Enable averaging function
 #          External LED status
 #          Voltage monitor
 #          Current monitor
 
+import time
+BootStart = time.ticks_ms()                     # (for the boot time profile, see BootMark)
 import rp2
 import network
 import ubinascii
 import machine
-import onewire
-import dht
-import ds18x20
-import urequests as requests
-import time
 from secrets import secrets
-import socket
 import domoticz
+import drivers
+import aggregate
+import spool
+import deadband
+import alarm
+import metrics
+import wifi
+import power
 import sensors
 import logging
+from scheduler import Scheduler
+# (mqtt, binlog, httpd, sampler & _thread are imported below only if they are used)
 
 # ***************************************
 # Notes...
@@ -54,14 +58,44 @@ import logging
 # ***************************************
 # Miscellaneous configuration
 # ***************************************
-# Raspberry Pi PICO ADC calibration (3.3V)
-conversion_factor = 3.3 / (65535)
-
 # External voltage calibration
 #voltage_a = 0                                  # Square factor if non-linear
 #voltage_b = (1 / 1000) * (1000 + 4700) * 0.995 # Gain factor from potential divider network
 #voltage_c = 0.00                               # Offset
 
+# Boot time profile - the time taken by each start up phase (imports, sensor
+# drivers, WIFI, first measurement...), written to the log with the first entry
+# A phase normally starts when the one before it ended. In dual core mode the
+# first measurement runs alongside the WIFI connection, so it is given its own
+# start time (when core 1 was started)
+BootTimes = []
+BootBegin = BootStart
+BootEnd = BootStart                             # ticks_ms when the last phase ended
+def BootMark(phase, start=None, now=None):
+    global BootStart, BootEnd
+    if now is None:
+        now = time.ticks_ms()
+    if start is None:
+        start = BootStart
+        BootStart = now
+    BootTimes.append((phase, time.ticks_diff(now, start)))
+    if time.ticks_diff(now, BootEnd) > 0:
+        BootEnd = now
+
+BootMark('imports')
+
+# Function to write the boot time profile to the log & metrics...
+def BootReport():
+    for phase, ms in BootTimes:
+        metrics.gauge('boot.' + phase + '_ms', ms)
+    total = time.ticks_diff(BootEnd, BootBegin)
+    metrics.memory()
+    report = 'Boot: ' + ', '.join([phase + ' ' + str(ms) + 'ms' for phase, ms in BootTimes]) + ', total ' + str(total) + 'ms'
+    if 'mem_free' in metrics.Gauges:
+        report = report + ', free memory ' + str(metrics.Gauges['mem_free']) + ' bytes'
+    DebugLog(report, 1, 1)
+
+
 # Function to log and / or print data & debug information
 DebugLevel = 1                                  # (0 = disable all logging to console)
 LogLevel = 0                                    # (0 = disable all logging to file)
@@ -71,134 +105,47 @@ def DebugLog(logString, PrintThreshold = 1, LogThreshold = 999):
 
 
 # Setup Log to file function
+# Log entries are buffered in RAM and written to flash when the buffer is full,
+# after LogFlushInterval seconds or straight away for errors.
+# When log.csv reaches LogMaxBytes it is renamed log.csv.1 (and so on up to
+# LogBackups files). Each file has a time index (log.csv.idx) - use
+# tools/logrange.py on the host to extract a time range.
 filename = 'log.csv'
-logging.basicConfig(filename=filename, level=logging.INFO, format='%(levelname)s,%(message)s')
-
-# Initialise analogue interface if used by any sensors
-if 'Analogue' in sensors.SensorType:
-    DebugLog("Initialising Analogue sensors")
-    sensor_alg = list(())
-    num_Alg_sensors = 0
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'Analogue':
-            sensor_alg.append(machine.ADC(sensors.SensorLoc[SensorID]))
-
-# Initialise one-wire interface if used by any sensors
-if 'T1w' in sensors.SensorType:
-    DebugLog("Initialising T1w sensors")
-    T1w_roms = list(())
-    T1w_id = 0
-    num_T1w_sensors = 0
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'T1w':
-            if T1w_id == 0:
-                T1w_sensors = ds18x20.DS18X20(onewire.OneWire(machine.Pin(sensors.SensorLoc[SensorID])))
-                T1w_roms = T1w_sensors.scan()
-            T1w_id = T1w_id + 1
-    
-    num_T1w_sensors = len(T1w_roms)
-    DebugLog('Found ' + str(num_T1w_sensors) + ' DSxx 1-wire device(s):')
-    for T1w_id in range(num_T1w_sensors):
-        #T1w_roms.append(roms[T1w_id])
-        DebugLog(str(T1w_roms[T1w_id]))
-
-
-# Initialise DHTxx one-wire interface if used by any sensors
-DHTxx_sensors = list(())
-if 'DHT11_T' in sensors.SensorType:
-    DebugLog("Initialising DHT11_T sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT11_T':
-            DHTxx_sensors.append(dht.DHT11(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHTxx_sensors)) + ' DHT11 1-wire device(s)')
-    
-if 'DHT11_H' in sensors.SensorType:
-    DebugLog("Initialising DHT11_H sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT11_H':
-            DHTxx_sensors.append(dht.DHT11(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHTxx_sensors)) + ' DHT11 1-wire device(s)')
-
-if 'DHT11_TH' in sensors.SensorType:
-    DebugLog("Initialising DHT11_T/H sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT11_TH':
-            DHTxx_sensors.append(dht.DHT11(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHTxx_sensors)) + ' DHT11 1-wire device(s)')
-
-if 'DHT22_T' in sensors.SensorType:
-    DebugLog("Initialising DHT22_T sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT22_T':
-            DHTxx_sensors.append(dht.DHT22(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHT22_sensors)) + ' DHT22 1-wire device(s)')
-    
-if 'DHT22_H' in sensors.SensorType:
-    DebugLog("Initialising DHT22_H sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT22_H':
-            DHTxx_sensors.append(dht.DHT22(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHTxx_sensors)) + ' DHT22 1-wire device(s)')
-
-if 'DHT22_TH' in sensors.SensorType:
-    DebugLog("Initialising DHT22_T/H sensors")
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'DHT22_TH':
-            DHTxx_sensors.append(dht.DHT22(machine.Pin(sensors.SensorLoc[SensorID])))
-
-    DebugLog('Found ' + str(len(DHTxx_sensors)) + ' DHT22 1-wire device(s)')
-
-# Initialise IOR sensor(s)
-IOR_interrupt=0
-def IOR_callback(pin):
-    global IOR_interrupt
-    IOR_interrupt = 1
-
-if 'IOR' in sensors.SensorType:    
-    DebugLog("Initialising Rising Edge IO sensors")
-    IOR_pins = list(())
-    IOR_sts = list(())
-    IOR_id = 0
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'IOR':
-            IOR_pins.append(machine.Pin(sensors.SensorLoc[SensorID], machine.Pin.IN))
-            IOR_sts.append(0)
-            IOR_pins[IOR_id].irq(trigger=machine.Pin.IRQ_RISING, handler=IOR_callback)
-            IOR_id = IOR_id + 1
-
-    DebugLog('Found ' + str(IOR_id) + ' IOR sensors')
-
-
-# Initialise PIR sensor(s)
-PIR_interrupt=0
-def PIR_callback(pin):
-    global PIR_interrupt
-    PIR_interrupt = 1
-
-if 'PIR' in sensors.SensorType:    
-    DebugLog("Initialising PIR sensors")
-    PIR_pins = list(())
-    PIR_sts = list(())
-    PIR_id = 0
-    for SensorID in range(sensors.ActiveSensors):
-        if sensors.SensorType[SensorID] == 'PIR':
-            PIR_pins.append(machine.Pin(sensors.SensorLoc[SensorID], machine.Pin.IN))
-            PIR_sts.append(0)
-            PIR_pins[PIR_id].irq(trigger=machine.Pin.IRQ_RISING, handler=PIR_callback)
-            PIR_id = PIR_id + 1
-
-    DebugLog('Found ' + str(PIR_id) + ' PIR sensors')
+LogBufferSize = 1024                            # Bytes (a power loss loses at most this much)
+LogFlushInterval = 60                           # Seconds
+LogMaxBytes = 65536                             # Maximum size of each log file
+LogBackups = 4                                  # Number of old log files kept
+LogHandler = logging.RotatingFileHandler(filename, maxBytes=LogMaxBytes, backupCount=LogBackups,
+                                         size=LogBufferSize, flush_interval=LogFlushInterval * 1000)
+logging.basicConfig(level=logging.INFO, format='%(levelname)s,%(message)s', handlers=[LogHandler])
+
+# Build the sensor drivers from the configuration in sensors.py
+Drivers = drivers.Build(DebugLog)
+DriverByID = {d.id: d for d in Drivers}
+BootMark('drivers')
+
+# Setup binary log file (one fixed size record per log entry)
+if sensors.LogFormat == 'bin':
+    import binlog
+    LogChannels = drivers.ChannelNames(Drivers)
+    LogValues = [None] * len(LogChannels)
+    BinLog = binlog.BinLog('log.bin', LogChannels)
+
+# Drivers grouped by the delay needed between starting and reading a measurement
+Phases = drivers.Phases(Drivers)
+Phase = 0
 
 
 # Initialise sensor data...
+# SensorVal holds the latest sample, LogVal the value logged for the log interval
 SensorVal = list(())
 for SensorID in range(sensors.ActiveSensors):
     SensorVal.append(0)
+LogVal = list(SensorVal)
+SensorTime = [0] * sensors.ActiveSensors        # time.time() of the latest sample (0 = none yet)
+
+# Statistics (mean, min, max...) for each channel over the log interval
+Stats = aggregate.Aggregator(drivers.ChannelCount(Drivers))
 
 # Initialise Reading counter
 Reading = 1
@@ -206,176 +153,382 @@ Reading = 1
 # Initialise domoticz_sts
 domoticz_sts = 'OK'
 
+# Transport for the Domoticz updates (sensors.Transport) - both modules have Upload, Probe & Stats
+if sensors.Transport == 'mqtt':
+    import mqtt
+    mqtt.Setup(sensors.MqttBroker, sensors.MqttPort, sensors.MqttQoS, secrets.get('mqtt_user'), secrets.get('mqtt_pw'))
+    Uplink = mqtt
+else:
+    Uplink = domoticz
+Upload = Uplink.Upload                          # (wrapped by Run to manage the WIFI power saving)
+# Upload statuses meaning the server was reached - only updates that could not be sent are queued,
+# updates the server rejected are dropped (counted in the domoticz.rejected / mqtt.rejected metrics)
+Answered = ('OK', Uplink.Rejected)
+
+# Report by exception - only values that have changed are sent to Domoticz
+Band = deadband.Deadband(sensors.Deadband, sensors.DeadbandPct, sensors.Heartbeat)
+
+# Threshold alarms (HighWarning / HighReset / LowWarning / LowReset), checked on every sample
+# Held back / failed notifications are sent by a job run every AlarmCheckInterval seconds
+AlarmCheckInterval = 5
+Alarms = alarm.Alarms(sensors.HighWarning, sensors.HighReset, sensors.LowWarning, sensors.LowReset, sensors.AlarmInterval)
+
+# Queue on flash for Domoticz updates that could not be sent
+Spool = spool.Spool('spool.bin', sensors.SpoolSize)
+
+# Network health check interval in seconds (the WIFI is reconnected by this check)
+HealthInterval = 1
+WifiStartTimeout = 30                           # Seconds to wait for the WIFI at start up
+WifiResetAfter = 3600                           # Reset the Pico if the WIFI is down this long (seconds, 0 = never)
+
+# Scheduler used to run the measure, log, LED & network health jobs
+Sched = Scheduler()
+
+# Dual core mode (sensors.DualCore) - the measure jobs run on core 1 with their own
+# scheduler and pass the samples to core 0 through Samples. Otherwise both are Sched.
+MeasureSched = Sched
+Samples = None
+if sensors.DualCore:
+    import sampler
+    import _thread
+    MeasureSched = Scheduler()
+    Samples = sampler.Ring(sensors.SampleQueue)
+IngestInterval = 250                            # ms between emptying Samples
+
+# Runtime metrics (see metrics.py) are written to the log every MetricsInterval seconds (0 = off)
+MetricsInterval = 3600
+StartTime = metrics.histogram('sensor.start')
+ReadTime = {d.id: metrics.histogram('read.' + d.tag()) for d in Drivers}
+LogWriteTime = metrics.histogram('log.write')
+SpoolWriteTime = metrics.histogram('spool.write')
+metrics.provider('scheduler', Sched.stats)
+if sensors.DualCore:
+    metrics.provider('sampler', MeasureSched.stats)
+    metrics.provider('samples', Samples.stats)
+for name in ('sensor.errors', 'sensor.slow'):
+    metrics.inc(name, 0)    # (listed in the metrics even when there have been none)
+metrics.provider('domoticz', Uplink.Stats)
+metrics.provider('spool', Spool.stats)
+metrics.provider('deadband', Band.stats)
+metrics.provider('alarms', Alarms.stats)
+metrics.provider('logfile', LogHandler.stats)
+
+# Status web server port (0 = off)
+# http://<pico address>/ gives the latest sensor values, /metrics the runtime metrics
+HttpPort = 80
+Httpd = None
+
+# Power saving (sensors.PowerMode / WifiPowerSave), set up by Run once the WIFI is on
+Power = None
+
+Booted = False                                  # First measurement done
+BootMark('setup')
+
+# Events from the measure jobs, see Event()
+EvStarted = 1                                   # All sensors started (us = time taken)
+EvNoStart = 2                                   # A sensor did not start
+EvSlow = 3                                      # A read took longer than its budget (us = time taken)
+EvError = 4                                     # A sensor did not respond
+EvUnavailable = 5                               # A sensor has failed too often & is retried less often
+EvBooted = 6                                    # First measurement done (us = ticks_ms when it ended)
+MeasureStart = None                             # ticks_ms when core 1 was started (dual core mode)
+
+# Function to report an event from the measure jobs (d = the sensor, None for EvStarted & EvBooted)...
+# In dual core mode these run on core 1, which must not use logging or metrics
+# (neither is thread safe), so the event is passed to core 0 through Samples
+def Event(d, code, us=-1):
+    if Samples is None:
+        Note(d, code, us)
+    else:
+        Samples.put(0 if d is None else d.id, 0, None, us, code)
+
+# Function to log & count an event from the measure jobs (on core 0)...
+def Note(d, code, us):
+    if code == EvStarted:
+        StartTime.add(us)
+        metrics.memory()
+    elif code == EvNoStart:
+        metrics.inc('sensor.errors')
+        DebugLog(d.tag() + ' did not start',1,0)
+    elif code == EvSlow:
+        metrics.inc('sensor.slow')
+        DebugLog(d.tag() + ' read took ' + str(us // 1000) + 'ms',1,0)
+    elif code == EvError:
+        metrics.inc('sensor.errors')
+        DebugLog(d.tag() + ' did not respond',1,0)
+    elif code == EvUnavailable:
+        DebugLog(d.tag() + ' unavailable, retrying less often',1,0)
+    elif code == EvBooted:
+        BootMark('first_measurement', MeasureStart, us)
 
 # Function to measure data...
-def MeasureData(NextMeasurementTime):
-    global SensorVal, DHT11_sensors, IOR_interrupt, PIR_interrupt
-    Alg_id = 0
-    T1w_id = 0
-    DHTxx_id = 0
-    IOR_id = 0
-    PIR_id = 0
-
-    TimeNow = time.time()
-    if TimeNow > NextMeasurementTime:
-        NextMeasurementTime = NextMeasurementTime + sensors.MeasurementInterval
-        
-        # Measure...
-        DebugLog('Measuring...')
-
-        # Blink LED when taking a measurement
-        blink_onboard_led(1)
-
-        for SensorID in range(sensors.ActiveSensors):
-            if sensors.SensorType[SensorID] == 'Analogue':
-                try:
-                    adc_val = sensor_alg[Alg_id].read_u16()
-                    adc_voltage = conversion_factor * adc_val
-                    SensorVal[SensorID] = sensors.Sensor_A[SensorID] * (adc_voltage**2) + sensors.Sensor_B[SensorID] * adc_voltage + sensors.Sensor_C[SensorID]
-                    DebugLog('Alg[' + str(Alg_id) + ']: ' + str(SensorVal[SensorID]),1,0)
-                except:
-                    DebugLog('Alg_sensor[' + str(Alg_id) + '] did not respond',1,0)
-                Alg_id = Alg_id + 1
-                
-            if sensors.SensorType[SensorID] == 'T1w':
-                try:
-                    if T1w_id == 0:
-                       T1w_sensors.convert_temp()
-                    SensorVal[SensorID] = round(T1w_sensors.read_temp(T1w_roms[T1w_id]),1)
-                    DebugLog('T1w[' + str(T1w_id) + ']: ' + str(SensorVal[SensorID]))                    
-                except:
-                    DebugLog('T1w_sensor[' + str(T1w_id) + '] did not respond',1,0)
-                T1w_id = T1w_id + 1
-                                
-            if sensors.SensorType[SensorID] == 'DHT11_T':
-                try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = DHTxx_sensors[DHTxx_id].temperature()
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT11[' + str(DHTxx_id) + ']_T: ' + str(SensorVal[SensorID]))                    
-                except:
-                    DebugLog('DHT11[' + str(DHTxx_id) + '] did not respond',1,0)
-                DHTxx_id = DHTxx_id + 1
-            
-            if sensors.SensorType[SensorID] == 'DHT11_H':
-                try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = DHTxx_sensors[DHTxx_id].humidity()
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT11[' + str(DHTxx_id) + ']_H: ' + str(SensorVal[SensorID]))                    
-                except:
-                    DebugLog('DHT11[' + str(DHTxx_id) + '] did not respond',1,0)
-                DHTxx_id = DHTxx_id + 1
-
-            if sensors.SensorType[SensorID] == 'DHT11_TH':
-                    #try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = str(DHTxx_sensors[DHTxx_id].temperature()) + ';'
-                    SensorVal[SensorID] = SensorVal[SensorID] + str(DHTxx_sensors[DHTxx_id].humidity())
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT11[' + str(DHTxx_id) + ']_TH: ' + str(SensorVal[SensorID]))                    
-                    #except:
-                    #DebugLog('DHT11[' + str(DHT11_id) + '] did not respond',1,0)
-                    DHTxx_id = DHTxx_id + 1
-
-            if sensors.SensorType[SensorID] == 'DHT22_T':
-                try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = DHTxx_sensors[DHTxx_id].temperature()
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT22[' + str(DHTxx_id) + ']_T: ' + str(SensorVal[SensorID]))                    
-                except:
-                    DebugLog('DHT22[' + str(DHTxx_id) + '] did not respond',1,0)
-                DHTxx_id = DHTxx_id + 1
-            
-            if sensors.SensorType[SensorID] == 'DHT22_H':
-                try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = DHTxx_sensors[DHTxx_id].humidity()
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT22[' + str(DHTxx_id) + ']_H: ' + str(SensorVal[SensorID]))                    
-                except:
-                    DebugLog('DHT22[' + str(DHTxx_id) + '] did not respond',1,0)
-                DHTxx_id = DHTxx_id + 1
-
-            if sensors.SensorType[SensorID] == 'DHT22_TH':
-                    #try:
-                    DHTxx_sensors[DHTxx_id].measure()
-                    SensorVal[SensorID] = str(DHTxx_sensors[DHTxx_id].temperature()) + ';'
-                    SensorVal[SensorID] = SensorVal[SensorID] + str(DHTxx_sensors[DHTxx_id].humidity())
-                    print(SensorVal[SensorID])
-                    DebugLog('DHT22[' + str(DHTxx_id) + ']_TH: ' + str(SensorVal[SensorID]))                    
-                    #except:
-                    #DebugLog('DHT11[' + str(DHT11_id) + '] did not respond',1,0)
-                    DHTxx_id = DHTxx_id + 1
-
-            if sensors.SensorType[SensorID] == 'IOR':
-                if IOR_interrupt == 1:
-                    SensorVal[SensorID] = SensorVal[SensorID] + 1
-                    IOR_interrupt = 0
-                DebugLog('IOR[' + str(IOR_id) + ']: ' + str(SensorVal[SensorID]))
-                IOR_id = IOR_id + 1
-
-            if sensors.SensorType[SensorID] == 'PIR':
-                if PIR_interrupt == 1:
-                    SensorVal[SensorID] = SensorVal[SensorID] + 1
-                    PIR_interrupt = 0
-                DebugLog('PIR[' + str(PIR_id) + ']: ' + str(SensorVal[SensorID]))
-                PIR_id = PIR_id + 1
-                
-    return NextMeasurementTime
+def MeasureData():
+    # Measure...
+    DebugLog('Measuring...')
+
+    # Blink LED when taking a measurement (LED job turns it off again, not in low power mode)
+    if sensors.PowerMode != 'light':
+        onboard_led.on()
+        MeasureSched.once('led', onboard_led.off, 200)
+
+    # Start all measurements, then collect each phase once its delay has passed
+    global Phase
+    t0 = time.ticks_us()
+    for d in Drivers:
+        try:
+            d.start()
+        except:
+            Event(d, EvNoStart)
+    Event(None, EvStarted, time.ticks_diff(time.ticks_us(), t0))
+    if Phases:
+        Phase = 0
+        MeasureSched.once('collect', CollectData, Phases[0][0])
+
+# Function to read the sensors in the current phase & schedule the next phase...
+def CollectData():
+    global Phase, Booted
+    delay, phase = Phases[Phase]
+    now = time.ticks_ms()
+    for d in phase:
+        if not d.due(now):
+            continue    # Sensor has failed, waiting for its backoff time
+        try:
+            t0 = time.ticks_us()
+            value = d.read()
+            us = time.ticks_diff(time.ticks_us(), t0)
+            if not d.succeeded(us, now):
+                Event(d, EvSlow, us)
+                if not d.available():
+                    value = None    # Too slow too many times in a row, reported as unavailable
+            Store(d, value, us)
+            DebugLog(d.tag() + ': ' + drivers.FormatValue(value))
+        except:
+            Event(d, EvError)
+            if d.failed(now):
+                Store(d, None)
+                Event(d, EvUnavailable)
+
+    Phase = Phase + 1
+    if Phase < len(Phases):
+        MeasureSched.once('collect', CollectData, Phases[Phase][0] - delay)
+    else:
+        drivers.SortPhases(Phases)    # Read the fastest sensors first next time
+        if not Booted:
+            Booted = True
+            Event(None, EvBooted, time.ticks_ms())
+
+# Function to pass on a new sample (None = sensor unavailable) & the time the read took (us, -1 = none)...
+# straight to Ingest(), or in dual core mode through the queue to core 0
+def Store(d, value, us=-1):
+    if Samples is None:
+        Ingest(d, value, None, us)
+    else:
+        Samples.put(d.id, time.time(), value, us)
+
+# Function to take the samples & events from core 1 out of the queue (dual core mode)...
+def Drain():
+    while True:
+        sample = Samples.get()
+        if sample is None:
+            return
+        SensorID, t, value, us, event = sample
+        if event:
+            Note(DriverByID.get(SensorID), event, us)
+        else:
+            Ingest(DriverByID[SensorID], value, t, us)
+
+# Function to store a new sample & add it to the statistics...
+def Ingest(d, value, t=None, us=-1):
+    if us >= 0:
+        ReadTime[d.id].add(us)
+    SensorVal[d.id] = value
+    if value is None:
+        return
+    SensorTime[d.id] = time.time() if t is None else t
+    if d.channels == 1:
+        Stats.add(d.chan, value)
+    else:
+        for n in range(d.channels):
+            Stats.add(d.chan + n, value[n])
+    if Alarms.check(d.id, value):
+        # Sent straight after the current job, so a slow upload does not hold up reading the other sensors
+        Sched.once('alarm_now', NotifyAlarms)
+
+# Function to send the alarm notifications due (run by the scheduler)...
+def NotifyAlarms():
+    Alarms.notify(SendAlarm)
+
+# Function to send an alarm notification (returns True if it was sent)...
+def SendAlarm(SensorID, state, value):
+    name = sensors.SensorName[SensorID]
+    DebugLog('Alarm: ' + name + ' ' + alarm.Names[state] + ' (' + drivers.FormatValue(value) + ')', 0,1)
+    ok = True
+    try:
+        if sensors.AlarmIDX != 'x':
+            # Alert device level: 1 = green (OK), 4 = red (alarm)
+            text = name + ' ' + alarm.Names[state] + ' ' + drivers.FormatValue(value)
+            if Uplink is domoticz:
+                text = domoticz.Quote(text)
+            ok = Upload([(sensors.AlarmIDX, text, 1 if state == alarm.OK else 4)]) == "OK"
+        if sensors.AlarmIFTTT:
+            ok = alarm.IFTTT(sensors.AlarmIFTTT, secrets['ifttt_key'], name, alarm.Names[state], drivers.FormatValue(value)) and ok
+    except Exception as e:
+        DebugLog('Alarm not sent: ' + repr(e), 0,0)
+        ok = False
+    if not ok:
+        metrics.inc('alarm.failed')
+    return ok
+
+# Function to work out the value to log for each sensor (sensors.LogStat) & start the next interval...
+def Summarise():
+    for d in Drivers:
+        if isinstance(d, drivers.Pulse):
+            LogVal[d.id] = SensorVal[d.id]
+            continue
+        stat = sensors.LogStat[d.id]
+        if d.channels == 1:
+            value = Stats.get(d.chan, stat)
+        else:
+            value = tuple([Stats.get(d.chan + n, stat) for n in range(d.channels)])
+            if None in value:
+                value = None
+        LogVal[d.id] = value    # (None if the sensor gave no values - it is logged as unavailable)
+        if DebugLevel >= 2:
+            DebugLog(d.tag() + ' summary: ' + str(Stats.summary(d.chan)), 2)
+    Stats.clear()
+
+# Function to reset interrupt based (counter) data...
+# Only the count that was logged is taken off, so edges counted since are logged next time
+def ResetSensor(d):
+    if d.counter:
+        d.reset(LogVal[d.id] or 0)
+        SensorVal[d.id] = 0
 
 # Function to log data...
-def LogData(NextLogTime):
+def LogData():
     global Reading, domoticz_sts
     
     TimeNow = time.time()
-    if TimeNow > NextLogTime:
-        NextLogTime = NextLogTime + sensors.LogInterval
-        
-        DebugLog('Logging...')
-
-        # Log to Domiticz server...
-        DebugLog ("Logging to Domoticz...")
-        domoticz_sts = 'OK'
-        for SensorID in range(sensors.ActiveSensors):
-            if sensors.DomoticzIDX[SensorID] != 'x' and domoticz_sts == 'OK':
-                domoticz_sts = domoticz.LogToDomoticz(sensors.DomoticzIDX[SensorID], SensorVal[SensorID])
-                if domoticz_sts == "OK":
-                    DebugLog('Domoticz Response: ' + domoticz_sts,0,1)
-                    SensorVal[SensorID] = 0 # Reset any interrupt based data
-                else:
-                    DebugLog('Domoticz Response: ' + domoticz_sts,0,0)
-
-        # Log to file...
-        # Log TitleString if this is the first log entry...
+    DebugLog('Logging...')
+    if Samples is not None:
+        Drain()
+    Summarise()
+
+    # Log to Domiticz server (all sensors in one batch)...
+    # If there is a backlog the new values join the end of the queue so they are sent in order
+    DebugLog ("Logging to Domoticz...")
+    Uploads = [d for d in Drivers if d.idx != 'x' and LogVal[d.id] is not None and Band.check(d.id, LogVal[d.id], TimeNow)]
+    DebugLog('Domoticz updates: ' + str(Band.stats()), 2)
+    items = [(d.idx, drivers.FormatValue(LogVal[d.id])) for d in Uploads]
+    if Spool.count == 0:
+        domoticz_sts = Upload(items)
+        DebugLog('Domoticz Response: ' + domoticz_sts,0,1 if domoticz_sts == "OK" else 0)
+        if domoticz_sts not in Answered:
+            DebugLog('Domoticz servers: ' + str(Uplink.Stats()),1,0)
+    if Spool.count > 0 or domoticz_sts not in Answered:
+        t0 = metrics.start()
+        Spool.put(TimeNow, items)
+        metrics.stop(SpoolWriteTime, t0)
+        DebugLog('Domoticz queue: ' + str(Spool.stats()),1,0)
+    for d in Uploads:
+        ResetSensor(d) # Reset any interrupt based data (it has been sent or queued)
+
+    # Log to file...
+    t0 = metrics.start()
+    if sensors.LogFormat == 'bin':
         if Reading == 1:
-            logTitleString = "Date / Time,"
-            for SensorID in range(sensors.ActiveSensors):
-                logTitleString = logTitleString + sensors.SensorName[SensorID] + ","
-            DebugLog (logTitleString, 1, 1)
-
-        logTime = str(time.gmtime(TimeNow)[0]) + '-' + str(time.gmtime(TimeNow)[1]) + '-' + str(time.gmtime(TimeNow)[2]) + ' '
-        logTime = logTime + str(time.gmtime(TimeNow)[3]) + ':' + str(time.gmtime(TimeNow)[4]) + ':' + str(time.gmtime(TimeNow)[5])
-        #logTime = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(TimeNow))
-        logString = logTime + "," + str(Reading) + ","
-        for SensorID in range(sensors.ActiveSensors):
-            logString = logString + str(SensorVal[SensorID]) + ","
-        DebugLog (logString, 1, 1)
-        
-        # Reset some measurements after logging...
+            BootReport()
+        if LogLevel >= 1:
+            BinLog.write(TimeNow, Reading, drivers.ChannelValues(Drivers, LogVal, LogValues))
+    elif Reading == 1:
+        BootReport()
+        # Log TitleString if this is the first log entry...
+        logTitleString = "Date / Time,"
         for SensorID in range(sensors.ActiveSensors):
-            if sensors.SensorType[SensorID] == 'PIR':
-                SensorVal[SensorID] = 0
-
-        # Next reading...
-        Reading = Reading + 1
-    
-    return NextLogTime
+            logTitleString = logTitleString + sensors.SensorName[SensorID] + ","
+        DebugLog (logTitleString, 1, 1)
+        LogHandler.header = logTitleString      # (repeated at the start of each new log file)
 
-
-# Connect to WLAN...
-def connect():
+    if DebugLevel >= 1 or (LogLevel >= 1 and sensors.LogFormat != 'bin'):
+        t = time.gmtime(TimeNow)
+        logTime = str(t[0]) + '-' + str(t[1]) + '-' + str(t[2]) + ' ' + str(t[3]) + ':' + str(t[4]) + ':' + str(t[5])
+        logString = logTime + "," + str(Reading) + ","
+        for SensorID in range(sensors.ActiveSensors):
+            logString = logString + drivers.FormatValue(LogVal[SensorID]) + ","
+        DebugLog (logString, 1, 999 if sensors.LogFormat == 'bin' else 1)
+    metrics.stop(LogWriteTime, t0)
+
+    # Event rate & time between events for the edge counters...
+    for d in Drivers:
+        if isinstance(d, drivers.Pulse):
+            DebugLog(d.tag() + ': ' + str(d.stats()))
+
+    # Reset some measurements after logging...
+    for d in Drivers:
+        if d.reset_on_log and d not in Uploads:    # (already reset if it was uploaded)
+            ResetSensor(d)
+
+    # Next reading...
+    Reading = Reading + 1
+
+    # Stop measuring & logging once the requested number of readings has been captured
+    if Reading >= sensors.NumReadings and sensors.NumReadings > 0:
+        if Samples is None:
+            Sched.cancel('measure')
+        else:
+            MeasureSched.stop()    # (core 1 stops once its current job is done)
+        Sched.cancel('log')
+        DebugLog('Readings complete: ' + str(Sched.stats()))
+        DebugLog('Log file: ' + str(LogHandler.stats()))
+        LogHandler.flush()
+
+# Function to replay queued Domoticz updates (a batch at a time) once the server can be reached...
+def ReplayData():
+    global domoticz_sts
+    if Spool.count > 0:
+        domoticz_sts = Spool.replay(Upload, sensors.ReplayBatch, Answered)
+        DebugLog('Domoticz replay: ' + domoticz_sts + ' ' + str(Spool.stats()),1,0)
+
+# Function to look after the WIFI connection (it reconnects in the background)...
+# The scheduler is only stopped (and the Pico reset) if the WIFI stays down for WifiResetAfter seconds
+def CheckNetwork():
+    if not Wifi.poll() and WifiResetAfter > 0 and Wifi.down_ms() >= WifiResetAfter * 1000:
+        DebugLog('WIFI down for ' + str(Wifi.down_ms() // 1000) + 's, stopping scheduler', 0,1)
+        Sched.stop()
+
+# Function to return the latest sensor values for the status web server...
+def Status():
+    now = time.time()
+    return {
+        'module': sensors.ModuleName,
+        'location': sensors.ModuleLoc,
+        'time': now,
+        'reading': Reading,
+        'domoticz': domoticz_sts,
+        'sensors': [{
+            'name': sensors.SensorName[d.id],
+            'type': sensors.SensorType[d.id],
+            'value': SensorVal[d.id],
+            'available': d.available(),
+            'alarm': alarm.Names[Alarms.state[d.id]],
+            'age_s': now - SensorTime[d.id] if SensorTime[d.id] else None,
+        } for d in Drivers],
+    }
+
+# Function to write the runtime metrics to the log & start the next period...
+def LogMetrics():
+    metrics.dump(lambda line: DebugLog(line, 1, 1))
+    metrics.clear()
+
+
+# WIFI networks from secrets.py (ssid0 / pw0, ssid1 / pw1...), tried in order
+Networks = []
+while 'ssid' + str(len(Networks)) in secrets:
+    n = str(len(Networks))
+    Networks.append((secrets['ssid' + n], secrets['pw' + n]))
+
+# Setup WLAN...
+def SetupWLAN():
     # Check the MAC address (for info only)
     MAC = ubinascii.hexlify(network.WLAN().config('mac'),':').decode()
     DebugLog('MAC Address = ' + MAC, 0,1)
@@ -385,84 +538,98 @@ def connect():
 
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
-
-    ssid_try = 0
-    ssid = secrets['ssid0']
-    pw = secrets['pw0']
-
-    timeout = 10 #10 second timeout before trying next ssid or giving up...
-    while ssid_try < 3 and wlan.isconnected() == False and timeout > 0:
-        # Read login secrets...
-        if ssid_try == 0:
-            ssid = secrets['ssid0']
-            pw = secrets['pw0']
-        elif ssid_try == 1:
-            ssid = secrets['ssid1']
-            pw = secrets['pw1']
-        else:    
-            ssid = secrets['ssid2']
-            pw = secrets['pw2']
-
-        wlan.connect(ssid, pw)
-    
-        while wlan.isconnected() == False and timeout > 0:
-            DebugLog('Waiting for connection...', 0,1)
-            timeout -= 1
-            time.sleep(1)
-        
-        if timeout == 0 and wlan.isconnected() == False: # Timeout occured, try a different SSID next time...
-            timeout = 10 #10 second timeout before trying next ssid or giving up...
-            ssid_try += 1
-            
-    if wlan.isconnected() == True:
-        status = wlan.ifconfig()
-        DebugLog('Connected to ' + ssid + ', IP Address = ' + status[0], 0,1)
-            
     return wlan
-    
 
 # Define blinking function for onboard LED to indicate error codes    
+onboard_led = machine.Pin('LED', machine.Pin.OUT)
 def blink_onboard_led(num_blinks=1):
-    led = machine.Pin('LED', machine.Pin.OUT)
     for i in range(num_blinks):
-        led.on()
+        onboard_led.on()
         time.sleep(.2)
-        led.off()
+        onboard_led.off()
         time.sleep(.2)
 
 
-wlan = connect()
-
-wlan_status = wlan.status()
-blink_onboard_led(wlan_status)
-
-TimeNow = time.time()
-NextMeasurementTime = TimeNow
-NextLogTime = TimeNow
-
-while (wlan_status == 3):
-    status = wlan.ifconfig()
-    DebugLog('Connected, IP Address = ' + status[0] + ')', 0,1)
-
-    while Reading < sensors.NumReadings or sensors.NumReadings < 1:
-        #DebugLog('Reading: ' + str(Reading) + '/' + str(sensors.NumReadings))
-        
-        # Run measurement routine...
-        NextMeasurementTime = MeasureData(NextMeasurementTime)
-    
-        # Run logging routine...
-        NextLogTime = LogData(NextLogTime)
-            
-    # Check log response in case there was a network error...
-    if sensors.Domoticz_En and domoticz_sts != 'OK':
-        wlan_status = 99 # Set wlan_status to 99 (or anything other than 3) to flag error
-    else:
-        # Re-check WIFI status before repeating the loop...
-        wlan_status = wlan.status()
-        
-# Blink LED 8 time to indicate loss of WIFI
-blink_onboard_led(8)
-
-# Reset Pico - hopefully a reset will fix the WIFI...
-print('Resetting Pico')
-machine.reset()
+# Function to work out the interval (ms) for a housekeeping job (network check, log flush...)...
+# In low power mode it is rounded up to a whole number of measurement intervals, so the
+# job runs in the same wake up as a measurement instead of waking the Pico by itself
+def JobInterval(ms):
+    if Power is None or Power.mode != 'light':
+        return ms
+    step = sensors.MeasurementInterval * 1000
+    return -(-ms // step) * step
+
+# Function to connect, schedule the jobs and run them...
+def Run():
+    global wlan, Wifi, Httpd, Power, Upload, MeasureStart
+
+    # Dual core mode - start measuring on core 1 straight away (it does not wait for the WIFI)
+    if Samples is not None and Phases and not MeasureSched.jobs:
+        MeasureStart = time.ticks_ms()
+        MeasureSched.every('measure', MeasureData, sensors.MeasurementInterval * 1000)
+        _thread.start_new_thread(MeasureSched.run, ())
+
+    wlan = SetupWLAN()
+    Wifi = wifi.Manager(wlan, Networks, DebugLog)
+    metrics.provider('wifi', Wifi.stats)
+    # Carry on without the WIFI if it cannot connect now, CheckNetwork keeps trying
+    Wifi.connect(WifiStartTimeout * 1000)
+    BootMark('wifi')
+    blink_onboard_led(wlan.status())
+
+    # Power saving - lightsleep between jobs (single core only) & WIFI power saving between uploads
+    lightsleep = sensors.PowerMode == 'light' and Samples is None
+    Power = power.Manager('light' if lightsleep else 'off', wlan if sensors.WifiPowerSave else None, sensors.BatteryCapacity)
+    metrics.provider('power', Power.stats)
+    if sensors.WifiPowerSave:
+        Upload = Power.wrap(Uplink.Upload)
+    if lightsleep:
+        Sched.sleep = Power.sleep
+
+    # Start the status web server - it answers requests while the scheduler is waiting
+    if HttpPort > 0 and Httpd is None and not lightsleep:
+        try:
+            import httpd
+            Httpd = httpd.Server(HttpPort)
+            Httpd.route('/', Status)
+            Httpd.route('/metrics', metrics.summary)
+            metrics.provider('httpd', Httpd.stats)
+            Sched.sleep = Httpd.wait
+        except Exception as e:
+            DebugLog('Status web server not started: ' + str(e), 0,1)
+
+    # Schedule the jobs - the scheduler sleeps until the next job is due
+    if Reading < sensors.NumReadings or sensors.NumReadings < 1:
+        if Samples is None:
+            Sched.every('measure', MeasureData, sensors.MeasurementInterval * 1000)
+        else:
+            Sched.every('ingest', Drain, IngestInterval, IngestInterval)
+        # First log is due once the first measurement has been collected
+        Sched.every('log', LogData, sensors.LogInterval * 1000, (Phases[-1][0] if Phases else 0) + 100)
+    for name, func, ms in (('replay', ReplayData, sensors.ReplayInterval * 1000),
+                           ('probe', Uplink.Probe, Uplink.BackoffMin),
+                           ('logflush', LogHandler.poll, 1000),
+                           ('alarm', NotifyAlarms, AlarmCheckInterval * 1000),
+                           ('network', CheckNetwork, HealthInterval * 1000),
+                           ('metrics', LogMetrics, MetricsInterval * 1000)):
+        if ms > 0:
+            Sched.every(name, func, JobInterval(ms), JobInterval(ms))
+
+    # Run the jobs (until the WIFI has been down for WifiResetAfter seconds)
+    # Domoticz errors & WIFI drop outs do not cause a reset, unsent updates are queued in Spool
+    Sched.run()
+    DebugLog('Scheduler: ' + str(Sched.stats()), 0,1)
+
+    # Blink LED 8 time to indicate loss of WIFI
+    blink_onboard_led(8)
+
+    # Reset Pico - hopefully a reset will fix the WIFI...
+    print('Resetting Pico')
+    logging.shutdown()
+    machine.reset()
+
+
+# Run the logger (main.py is run as __main__ on the Pico, the simulator in
+# sim/ imports it instead to benchmark the functions above)
+if __name__ == '__main__':
+    Run()
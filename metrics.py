@@ -0,0 +1,150 @@
+# Runtime metrics for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 17/10/2026 23:00
+# Last change: First version
+#
+# Counters, gauges and timing histograms, cheap enough to leave on:
+#   inc('name')               - count something
+#   gauge('name', value)      - record the latest value of something
+#   t = start() ... stop(h, t) - time something (microseconds) into histogram h
+# Histograms have fixed buckets (no memory is allocated per sample), so the
+# percentiles are approximate - the upper edge of the bucket they fall in.
+# provider('name', func) adds the stats() of another module to the summary.
+
+import array
+import gc
+import time
+
+# Histogram bucket upper edges in microseconds (the last bucket is everything slower)
+Bounds = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000, 2500000)
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = array.array('L', [0] * (len(Bounds) + 1))
+        self.total = 0
+        self.max = 0
+
+    # Add a time in microseconds
+    def add(self, us):
+        i = 0
+        for bound in Bounds:
+            if us < bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.total += us
+        if us > self.max:
+            self.max = us
+
+    def count(self):
+        return sum(self.counts)
+
+    # Return the upper edge of the bucket holding the p'th percentile (or the maximum if lower)
+    def percentile(self, p):
+        n = self.count()
+        if n == 0:
+            return 0
+        limit = n * p / 100
+        seen = 0
+        for i in range(len(self.counts)):
+            seen += self.counts[i]
+            if seen >= limit:
+                return min(Bounds[i], self.max) if i < len(Bounds) else self.max
+        return self.max
+
+    def summary(self):
+        n = self.count()
+        return {
+            'n': n,
+            'avg_us': self.total // n if n else 0,
+            'p50_us': self.percentile(50),
+            'p95_us': self.percentile(95),
+            'max_us': self.max,
+        }
+
+    def clear(self):
+        for i in range(len(self.counts)):
+            self.counts[i] = 0
+        self.total = 0
+        self.max = 0
+
+
+Counters = {}
+Gauges = {}
+Histograms = {}
+Providers = {}
+
+# Lowest free memory seen by memory()
+MemLow = None
+
+# Function to add n to a counter...
+def inc(name, n=1):
+    Counters[name] = Counters.get(name, 0) + n
+
+# Function to set a gauge...
+def gauge(name, value):
+    Gauges[name] = value
+
+# Function to return the histogram called name (created if needed)...
+# Keep the result to avoid looking it up on every sample
+def histogram(name):
+    h = Histograms.get(name)
+    if h is None:
+        h = Histogram()
+        Histograms[name] = h
+    return h
+
+# Function to start timing, returns the start time for stop()...
+def start():
+    return time.ticks_us()
+
+# Function to add the time since t0 to histogram h (a Histogram or its name), returns the time in us...
+def stop(h, t0):
+    us = time.ticks_diff(time.ticks_us(), t0)
+    if isinstance(h, str):
+        h = histogram(h)
+    h.add(us)
+    return us
+
+# Function to record the free memory & the lowest free memory seen...
+def memory():
+    global MemLow
+    if not hasattr(gc, 'mem_free'):
+        return
+    free = gc.mem_free()
+    if MemLow is None or free < MemLow:
+        MemLow = free
+    Gauges['mem_free'] = free
+    Gauges['mem_low'] = MemLow
+
+# Function to add the stats() of another module to the summary...
+def provider(name, func):
+    Providers[name] = func
+
+# Function to return all the metrics...
+def summary():
+    memory()
+    result = {
+        'counters': dict(Counters),
+        'gauges': dict(Gauges),
+        'timings': {name: Histograms[name].summary() for name in Histograms},
+    }
+    for name in Providers:
+        try:
+            result[name] = Providers[name]()
+        except Exception as e:
+            result[name] = str(e)
+    return result
+
+# Function to write the metrics, one line per group, using log(string)...
+def dump(log):
+    s = summary()
+    for group in s:
+        log('Metrics ' + group + ': ' + str(s[group]))
+
+# Function to start the next reporting period (timings only, counters keep counting)...
+def clear():
+    for name in Histograms:
+        Histograms[name].clear()
@@ -0,0 +1,248 @@
+# Minimal MQTT 3.1.1 publisher for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 05:15
+# Last change: Messages not acknowledged are counted & reported as Rejected
+#
+# An alternative to the HTTP requests in domoticz.py (see sensors.Transport)
+# with the same Upload / Probe / Stats functions. Updates are published to
+# Domoticz's MQTT gateway topic (domoticz/in) as
+#   {"idx":105,"nvalue":0,"svalue":"21.3;54.0"}
+# The gateway takes one device per message, so each update is a separate
+# PUBLISH, but all the updates from one call are written to the socket in
+# one go over a single persistent connection, then the PUBACKs (QoS 1) are
+# read back.
+
+import json
+import socket
+import time
+import machine
+import ubinascii
+import metrics
+
+Topic = 'domoticz/in'
+ClientID = 'picologger-' + ubinascii.hexlify(machine.unique_id()).decode()
+
+QoS = 1                 # 0 = fire & forget, 1 = acknowledged by the broker (see Setup)
+KeepAlive = 120         # Seconds, the connection is pinged by Probe() when idle
+Timeout = 5             # Socket timeout in seconds
+
+# Status returned by Upload() when the broker was reached but did not acknowledge every message
+Rejected = "Error: (Not acknowledged)"
+
+# Time between reconnection attempts after a failure (ms), doubles after each failure up to BackoffMax
+BackoffMin = 5000
+BackoffMax = 300000
+
+# Packet types
+_CONNECT = 0x10
+_CONNACK = 0x20
+_PUBLISH = 0x30
+_PUBACK = 0x40
+_PINGREQ = 0xC0
+_PINGRESP = 0xD0
+_DISCONNECT = 0xE0
+
+# Function to append an MQTT packet (type, body) to buf...
+def _packet(buf, kind, body):
+    buf.append(kind)
+    n = len(body)
+    while True:                      # Remaining length, 7 bits per byte
+        byte = n & 0x7F
+        n >>= 7
+        buf.append(byte | 0x80 if n else byte)
+        if not n:
+            break
+    buf.extend(body)
+
+# Function to encode a UTF-8 string with its 2 byte length...
+def _string(s):
+    if isinstance(s, str):
+        s = s.encode()
+    return bytes((len(s) >> 8, len(s) & 0xFF)) + s
+
+class Client:
+    def __init__(self, host, port, user=None, password=None):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.sock = None
+        self.pid = 0                 # Last packet id used
+        self.buf = bytearray()
+        self.healthy = True
+        self.failures = 0
+        self.next_probe = 0
+        self.last_sent = time.ticks_ms()
+        self.latency_ms = 0
+        self.published = 0
+
+    def connect(self):
+        self.close()
+        addr = socket.getaddrinfo(self.host, self.port)[0][-1]
+        sock = socket.socket()
+        sock.settimeout(Timeout)
+        try:
+            sock.connect(addr)
+            flags = 0x02             # Clean session
+            body = bytearray(b'\x00\x04MQTT\x04')
+            payload = bytearray(_string(ClientID))
+            if self.user:
+                flags |= 0x80
+                payload.extend(_string(self.user))
+                if self.password:
+                    flags |= 0x40
+                    payload.extend(_string(self.password))
+            body.append(flags)
+            body.extend(bytes((KeepAlive >> 8, KeepAlive & 0xFF)))
+            body.extend(payload)
+            buf = bytearray()
+            _packet(buf, _CONNECT, body)
+            sock.sendall(buf)
+            ack = self._read(sock, 4)
+            if ack[0] != _CONNACK or ack[3] != 0:
+                raise OSError('MQTT connect refused (' + str(ack[3]) + ')')
+        except:
+            sock.close()
+            raise
+        self.sock = sock
+        self.last_sent = time.ticks_ms()
+
+    def _read(self, sock, n):
+        data = b''
+        while len(data) < n:
+            chunk = sock.recv(n - len(data))
+            if not chunk:
+                raise OSError('Connection closed')
+            data += chunk
+        return data
+
+    # Publish [(idx, svalue) or (idx, svalue, nvalue), ...], returns the number acknowledged
+    def publish(self, items):
+        if self.sock is None:
+            self.connect()
+        topic = _string(Topic)
+        buf = self.buf
+        buf[:] = b''
+        for item in items:
+            payload = ('{"idx":' + item[0] + ',"nvalue":' + (str(item[2]) if len(item) > 2 else '0') +
+                       ',"svalue":' + json.dumps(item[1]) + '}').encode()
+            if QoS:
+                self.pid = self.pid % 0xFFFF + 1
+                body = topic + bytes((self.pid >> 8, self.pid & 0xFF)) + payload
+                _packet(buf, _PUBLISH | 0x02, body)
+            else:
+                _packet(buf, _PUBLISH, topic + payload)
+        self.sock.sendall(buf)
+        self.last_sent = time.ticks_ms()
+        if not QoS:
+            return len(items)
+
+        # One PUBACK per message, in order
+        acked = 0
+        for n in range(len(items)):
+            ack = self._read(self.sock, 4)
+            if ack[0] == _PUBACK:
+                acked += 1
+        return acked
+
+    # Keep the connection alive (when it has been idle), raises an exception if the broker does not answer
+    def ping(self):
+        if self.sock is None:
+            self.connect()
+            return
+        if time.ticks_diff(time.ticks_ms(), self.last_sent) < KeepAlive * 500:
+            return
+        self.sock.sendall(bytes((_PINGREQ, 0)))
+        self.last_sent = time.ticks_ms()
+        if self._read(self.sock, 2)[0] != _PINGRESP:
+            raise OSError('Bad PINGRESP')
+
+    def failed(self):
+        self.close()
+        self.failures += 1
+        self.healthy = False
+        backoff = min(BackoffMin << min(self.failures - 1, 16), BackoffMax)
+        self.next_probe = time.ticks_add(time.ticks_ms(), backoff)
+
+    def succeeded(self, ms):
+        self.healthy = True
+        self.failures = 0
+        self.latency_ms = ms if self.latency_ms == 0 else (3 * self.latency_ms + ms) // 4
+
+    def probe_due(self):
+        return not self.healthy and time.ticks_diff(time.ticks_ms(), self.next_probe) >= 0
+
+    def close(self):
+        if self.sock is not None:
+            try:
+                self.sock.sendall(bytes((_DISCONNECT, 0)))
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+
+    def stats(self):
+        return {
+            'host': self.host,
+            'healthy': self.healthy,
+            'failures': self.failures,
+            'latency_ms': self.latency_ms,
+            'published': self.published,
+        }
+
+
+Server = None
+UploadTime = metrics.histogram('mqtt.upload')
+
+# Function to set up the connection to the broker (it is opened by the first upload)...
+def Setup(host, port=1883, qos=1, user=None, password=None):
+    global Server, QoS
+    QoS = qos
+    Server = Client(host, port, user, password)
+
+# Function to publish a list of [(idx, svalue), ...] updates (same as domoticz.Upload)...
+def Upload(items):
+    if not items:
+        return "OK"
+    conn = Server
+    if not conn.healthy and not conn.probe_due():
+        metrics.inc('mqtt.unsent', len(items))
+        return "Error: (Broker unavailable)"
+    t = metrics.start()
+    acked = 0
+    for attempt in range(2):         # Retry once in case the broker dropped an idle connection
+        try:
+            acked = conn.publish(items)
+            break
+        except Exception:
+            conn.close()
+            acked = -1
+    us = metrics.stop(UploadTime, t)
+    if acked < 0:
+        conn.failed()
+        metrics.inc('mqtt.failed')
+        return "Error: (Unable to publish)"
+    conn.succeeded(us // 1000)
+    conn.published += acked
+    metrics.inc('mqtt.updates', acked)
+    if acked < len(items):
+        metrics.inc('mqtt.rejected', len(items) - acked)
+        return Rejected
+    return "OK"
+
+# Function to keep the connection alive & reconnect after a failure (run in the background)...
+def Probe():
+    conn = Server
+    if conn.healthy and conn.sock is None:
+        return
+    if not conn.healthy and not conn.probe_due():
+        return
+    t = time.ticks_ms()
+    try:
+        conn.ping()
+        conn.succeeded(time.ticks_diff(time.ticks_ms(), t))
+    except Exception:
+        conn.failed()
+
+def Stats():
+    return [Server.stats()]
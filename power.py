@@ -0,0 +1,99 @@
+# Power management for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 07:30
+# Last change: Comment - housekeeping jobs are aligned with the measurements
+#
+# For battery powered loggers. sleep() is used as the scheduler's sleep, so
+# in 'light' mode the RP2040 is put in machine.lightsleep() until the next
+# job is due instead of idling at full clock speed. The housekeeping jobs
+# (network check, log flush...) are run at a multiple of the measurement
+# interval (main.JobInterval), so the Pico only wakes to measure & log.
+# The timer keeps running, so ticks_ms() stays correct, and any
+# enabled interrupt wakes it early - the PIR / IOR pulse counters (hard IRQs)
+# still count every edge and the scheduler just goes back to sleep.
+#
+# The WIFI chip is kept in its power saving mode and only switched to full
+# performance while an upload is being sent (see wrap).
+#
+# The time spent awake & asleep is counted (stats) to give the duty cycle and,
+# if the battery capacity is known, an estimate of the battery life.
+
+import time
+import machine
+import network
+
+# Sleeps shorter than this (ms) use time.sleep_ms (lightsleep takes time to enter & leave)
+MinSleep = 20
+
+# Average current (mA) awake & in lightsleep, used for the battery life estimate
+# (typical Pico W values with the WIFI connected in power save mode - measure your own)
+AwakeCurrent = 45
+SleepCurrent = 12
+
+class Manager:
+    def __init__(self, mode='off', wlan=None, battery=0):
+        self.mode = mode                    # 'off' = normal sleep, 'light' = lightsleep
+        self.wlan = wlan                    # WIFI interface to manage (None = leave it alone)
+        self.battery = battery              # Battery capacity (mAh, 0 = no estimate)
+        self.started = time.ticks_ms()
+        self.asleep_ms = 0
+        self.sleeps = 0
+        self.early = 0                      # Woken before the time requested (by an interrupt)
+        self.uploads = 0
+        self.radio_ms = 0                   # Time the WIFI was at full performance
+        if wlan is not None:
+            self.radio(False)
+
+    # Wait ms milliseconds (used as the scheduler's sleep)
+    def sleep(self, ms):
+        if self.mode != 'light' or ms < MinSleep:
+            time.sleep_ms(ms)
+            return
+        t = time.ticks_ms()
+        machine.lightsleep(ms)
+        slept = time.ticks_diff(time.ticks_ms(), t)
+        self.asleep_ms += slept
+        self.sleeps += 1
+        if slept < ms - 1:
+            self.early += 1
+
+    # Switch the WIFI power saving off (busy = True) or back on
+    def radio(self, busy):
+        if self.wlan is None:
+            return
+        try:
+            self.wlan.config(pm=network.WLAN.PM_PERFORMANCE if busy else network.WLAN.PM_POWERSAVE)
+        except (ValueError, AttributeError, OSError):
+            self.wlan = None                # Not supported by this firmware
+
+    # Return func wrapped so the WIFI is at full performance while it runs (for the uploads)
+    def wrap(self, func):
+        def wrapped(*args):
+            t = time.ticks_ms()
+            self.radio(True)
+            try:
+                return func(*args)
+            finally:
+                self.radio(False)
+                self.uploads += 1
+                self.radio_ms += time.ticks_diff(time.ticks_ms(), t)
+        return wrapped
+
+    def stats(self):
+        uptime = max(time.ticks_diff(time.ticks_ms(), self.started), 1)
+        awake = 1 - self.asleep_ms / uptime
+        stats = {
+            'mode': self.mode,
+            'awake_ms': uptime - self.asleep_ms,
+            'asleep_ms': self.asleep_ms,
+            'awake_pct': round(100 * awake, 1),
+            'sleeps': self.sleeps,
+            'early_wakes': self.early,
+            'uploads': self.uploads,
+            'radio_ms': self.radio_ms,
+        }
+        current = AwakeCurrent * awake + SleepCurrent * (1 - awake)
+        stats['current_ma'] = round(current, 1)
+        if self.battery > 0:
+            stats['battery_hours'] = round(self.battery / current)
+        return stats
@@ -0,0 +1,92 @@
+# Sample queue between the two cores (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 06:45
+# Last change: Carries the read time of each sample & events (errors, timings) to core 0
+#
+# In dual core mode (sensors.DualCore) the sensors are read on core 1 and
+# each sample is put in this ring buffer with the time it was taken. Core 0
+# takes them out (get) to update the statistics, so a slow upload or file
+# write on core 0 does not delay the sampling.
+# Core 1 must not use logging or metrics (neither is thread safe), so each
+# sample also carries the time the read took, and events such as a sensor
+# error are passed as entries with an event code, for core 0 to log & count.
+# The ring is preallocated, put() does not allocate memory. If core 0 falls
+# so far behind that the ring fills, the oldest entries are dropped.
+
+import array
+import _thread
+
+# Kind of value held in each slot
+_NONE = 0     # Sensor unavailable
+_FLOAT = 1
+_INT = 2
+_PAIR = 3     # (temperature, humidity)
+
+class Ring:
+    def __init__(self, size=64):
+        self.size = size
+        self.ids = array.array('H', [0] * size)      # SensorID
+        self.times = array.array('L', [0] * size)    # time.time() when taken
+        self.kinds = bytearray(size)
+        self.ints = array.array('l', [0] * size)
+        self.vals = array.array('f', [0] * (2 * size))
+        self.us = array.array('l', [0] * size)       # Read time (us, -1 = not timed)
+        self.events = bytearray(size)                # Event code (0 = a sample)
+        self.head = 0                                # Next slot to read
+        self.count = 0
+        self.drops = 0
+        self.puts = 0
+        self.lock = _thread.allocate_lock()
+
+    # Add a sample, or an event if event is not 0 (core 1)
+    def put(self, SensorID, t, value, us=-1, event=0):
+        with self.lock:
+            if self.count == self.size:
+                self.head = (self.head + 1) % self.size    # Full - drop the oldest
+                self.count -= 1
+                self.drops += 1
+            i = (self.head + self.count) % self.size
+            self.ids[i] = SensorID
+            self.times[i] = t
+            self.us[i] = us
+            self.events[i] = event
+            if value is None:
+                self.kinds[i] = _NONE
+            elif isinstance(value, tuple):
+                self.kinds[i] = _PAIR
+                self.vals[2 * i] = value[0]
+                self.vals[2 * i + 1] = value[1]
+            elif isinstance(value, int):
+                self.kinds[i] = _INT
+                self.ints[i] = value
+            else:
+                self.kinds[i] = _FLOAT
+                self.vals[2 * i] = value
+            self.count += 1
+            self.puts += 1
+
+    # Take the oldest entry (core 0), returns (SensorID, time, value, us, event) or None if empty
+    def get(self):
+        with self.lock:
+            if self.count == 0:
+                return None
+            i = self.head
+            self.head = (i + 1) % self.size
+            self.count -= 1
+            kind = self.kinds[i]
+            if kind == _PAIR:
+                value = (self.vals[2 * i], self.vals[2 * i + 1])
+            elif kind == _INT:
+                value = self.ints[i]
+            elif kind == _FLOAT:
+                value = self.vals[2 * i]
+            else:
+                value = None
+            return (self.ids[i], self.times[i], value, self.us[i], self.events[i])
+
+    def stats(self):
+        return {
+            'depth': self.count,
+            'samples': self.puts,
+            'drops': self.drops,
+        }
@@ -0,0 +1,119 @@
+# Deadline scheduler for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 17/10/2026 09:00
+# Last change: First version - replaces the busy-wait loop in main.py
+#
+# Jobs are run when their deadline falls due. Between deadlines the
+# scheduler sleeps until the next one instead of polling time.time(),
+# so the core is idle between measurement ticks.
+# Idle time and jitter (how late each job started) are counted so the
+# behaviour of the loop can be checked.
+
+import time
+
+# A single scheduled job...
+class Job:
+    __slots__ = ('name', 'func', 'interval', 'deadline', 'runs', 'overruns', 'late_max', 'late_total')
+
+    def __init__(self, name, func, interval, deadline):
+        self.name = name
+        self.func = func
+        self.interval = interval     # ms between runs (0 = run once)
+        self.deadline = deadline     # ticks_ms value when next due
+        self.runs = 0
+        self.overruns = 0            # Number of deadlines missed completely
+        self.late_max = 0            # Worst start jitter (ms)
+        self.late_total = 0          # Sum of start jitter (ms)
+
+
+class Scheduler:
+    def __init__(self, sleep=None):
+        self.jobs = []
+        self.running = False
+        self.sleep = time.sleep_ms if sleep is None else sleep  # Function used to wait (ms)
+        self.started = time.ticks_ms()
+        self.idle_ms = 0
+        self.runs = 0
+        self.late_max = 0
+        self.late_total = 0
+
+    # Add a repeating job, first due after delay_ms (default: now)
+    def every(self, name, func, interval_ms, delay_ms=0):
+        self.cancel(name)
+        job = Job(name, func, interval_ms, time.ticks_add(time.ticks_ms(), delay_ms))
+        self.jobs.append(job)
+        return job
+
+    # Add a job that runs once after delay_ms (replaces any pending job of the same name)
+    def once(self, name, func, delay_ms=0):
+        return self.every(name, func, 0, delay_ms)
+
+    def cancel(self, name):
+        for job in self.jobs:
+            if job.name == name:
+                self.jobs.remove(job)
+                return
+
+    def stop(self):
+        self.running = False
+
+    # Run every job that is due, return ms until the next deadline (-1 if no jobs)
+    def run_pending(self):
+        for job in self.jobs[:]:
+            now = time.ticks_ms()
+            late = time.ticks_diff(now, job.deadline)
+            if late < 0:
+                continue
+
+            job.runs += 1
+            job.late_total += late
+            if late > job.late_max:
+                job.late_max = late
+            self.runs += 1
+            self.late_total += late
+            if late > self.late_max:
+                self.late_max = late
+
+            if job.interval == 0:
+                self.jobs.remove(job)
+            else:
+                # Fixed rate - keep to the original phase unless a whole interval was missed
+                job.deadline = time.ticks_add(job.deadline, job.interval)
+                if time.ticks_diff(now, job.deadline) >= 0:
+                    job.overruns += 1
+                    job.deadline = time.ticks_add(now, job.interval)
+
+            job.func()
+
+        if not self.jobs:
+            return -1
+        now = time.ticks_ms()
+        wait = time.ticks_diff(self.jobs[0].deadline, now)
+        for job in self.jobs:
+            wait = min(wait, time.ticks_diff(job.deadline, now))
+        return max(wait, 0)
+
+    # Run jobs until stop() is called or no jobs remain
+    def run(self):
+        self.running = True
+        while self.running:
+            wait = self.run_pending()
+            if wait < 0:
+                break
+            if wait > 0 and self.running:
+                t = time.ticks_ms()
+                self.sleep(wait)
+                self.idle_ms += time.ticks_diff(time.ticks_ms(), t)
+        self.running = False
+
+    # Summary of idle time & jitter counters
+    def stats(self):
+        uptime = max(time.ticks_diff(time.ticks_ms(), self.started), 1)
+        return {
+            'uptime_ms': uptime,
+            'idle_ms': self.idle_ms,
+            'idle_pct': round(100 * self.idle_ms / uptime, 1),
+            'runs': self.runs,
+            'late_max_ms': self.late_max,
+            'late_avg_ms': round(self.late_total / self.runs, 1) if self.runs else 0,
+        }
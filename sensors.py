@@ -10,10 +10,14 @@ SensorType = ['Type1', 'Type2', 'Type3', '...', 'Type255']
 # 'T1w' = One-Wire Temperature Sensor 
 # 'Analogue, = ADC reading
 # 'PIR' = Passive Infrared sensor / motion sensor
+# 'IOR' = Rising-Edge IO sensor
+# 'Counter_R' = Rising-Edge IO pulse counter (non-resetting)
+# 'Counter_F' = Falling-Edge IO pulse counter (non-resetting)
+# 'DHT11_T', 'DHT11_H', 'DHT11_TH' = DHT11 Temperature, Humidity or both
+# 'DHT22_T', 'DHT22_H', 'DHT22_TH' = DHT22 Temperature, Humidity or both
+# (Each supported type has an entry in drivers.Registry)
 
 # The following are planned but not yet supported...
-# 'Counter_R' = Rising-Edge IO pulse counter
-# 'Counter_F' = Falling-Edge IO pulse counter
 # 'Int_Temp' = local / internal temperature
 # 'Throttle_Status' = CPU Throttle status (Current throttle status)
 # 'Throttle_Level' = CPU Throttle level (% time throttled)
@@ -35,19 +39,97 @@ Sensor_A = [0.0, 0.0, 0.0, 0.0, 0.0]
 Sensor_B = [1.0, 1.0, 1.0, 1.0, 1.0]
 Sensor_C = [0.0, 0.0, 0.0, 0.0, 0.0]
 
+# Analogue sensors - number of ADC samples taken in a burst for each reading (1 = single sample, up to 4096)
+# and the value worked out from them (the calibration above is applied to it):
+# 'mean' = average (less noise), 'rms' = RMS of the variation about the mean (AC), 'peak' = largest sample
+# For 'rms' only the gain (Sensor_B) is applied - the mean, and so any DC offset, has already been
+# taken out, so Sensor_A & Sensor_C are not used (e.g. a current transformer: B = amps per volt)
+ADCSamples = [1, 1, 1, 1, 1]
+ADCMode = ['mean', 'mean', 'mean', 'mean', 'mean']
+ADCRate = 10000                                # Samples per second in a burst (0 = as fast as possible)
+
+# Value logged for each sensor, from the samples taken during the log interval
+# 'last', 'mean', 'min', 'max', 'std' (standard deviation) or 'count' (number of samples)
+# (PIR / IOR / Counter sensors always log their count)
+LogStat = ['mean', 'mean', 'mean', 'mean', 'mean']
+
+# DSxx 1-wire resolution in bits (9 - 12), ignored for other sensor types
+# Lower resolution = faster conversion: 9 = 94ms, 10 = 188ms, 11 = 375ms, 12 = 750ms
+T1wResolution = [12, 12, 12, 12, 12]
+
+# Time allowed for reading each sensor in ms (0 = default for the sensor type)
+# A read that takes longer counts as a failure
+ReadBudget = [0, 0, 0, 0, 0]
+
+# A sensor that fails SensorRetries times in a row is logged as unavailable and
+# only retried after a backoff time (doubling from MeasurementInterval up to SensorBackoffMax seconds)
+SensorRetries = 3
+SensorBackoffMax = 600
+
+# Number of edge times kept for each PIR / IOR / Counter sensor (0 = off)
+# Used for the event rate & time between events statistics
+PulseLog = 32
+
 # Sensor Error & Warning thresholds
 # Set Warning and Reset thresholds to 0 to disable
+# An alarm is raised when a value reaches the Warning threshold and cleared when it is back past the Reset threshold
+# (T & H sensors use the temperature)
 HighWarning = [0,0,0,0,0]
 HighReset   = [0,0,0,0,0]
 LowWarning  = [0,0,0,0,0]
 LowReset    = [0,0,0,0,0]
 
+# Alarms are sent straight away when raised or cleared, to...
+AlarmIDX = 'x'                                 # Domoticz Alert device idx ('x' = off)
+AlarmIFTTT = ''                                # IFTTT webhook event name, uses secrets['ifttt_key'] ('' = off)
+AlarmInterval = 300                            # Minimum seconds between alarms for each sensor
+
 # Domoticz config
 Domoticz_En = True
 DomoticzIDX = ['x', 'x', 'x', 'x', 'x'] # Use 'x' to disable logging to Domoticz for each sensor
 
+# How updates are sent to Domoticz
+# 'http' = JSON API requests to the servers in domoticz.py
+# 'mqtt' = publish to Domoticz's MQTT gateway (domoticz/in) through a broker,
+#          user & password from secrets['mqtt_user'] / secrets['mqtt_pw'] if set
+Transport = 'http'
+MqttBroker = '192.168.1.32'
+MqttPort = 1883
+MqttQoS = 1                                    # 0 = fire & forget, 1 = acknowledged by the broker
+
+# Report by exception - a value is only sent to Domoticz when it has changed
+# by more than the deadband since the last value sent (0 = off, always send)
+Deadband = [0, 0, 0, 0, 0]                     # Absolute change
+DeadbandPct = [0, 0, 0, 0, 0]                  # Change relative to the last value sent (%)
+Heartbeat = 900                                # Seconds before a value is sent anyway
+
+# Updates that could not be sent are queued on flash and replayed later
+SpoolSize = 512                                # Maximum number of queued updates (oldest dropped when full)
+ReplayBatch = 20                               # Maximum number of queued updates sent per replay
+ReplayInterval = 5                             # Seconds between replays
+
 # Other options
 
+# Dual core mode - read the sensors on the second core, so uploads & file writes
+# cannot delay the measurements (True / False)
+DualCore = False
+SampleQueue = 64                               # Samples held between the cores
+
+# Power saving for battery powered loggers (see power.py)
+# 'off'   = the Pico idles at full speed between jobs
+# 'light' = lightsleep until the next job is due (PIR / IOR edges are still counted),
+#           no measurement LED flash & no status web server (not used in dual core mode).
+#           The network check, log flush, replay... are only run with the measurements,
+#           so the Pico only wakes up to measure & log
+PowerMode = 'off'
+WifiPowerSave = True                           # WIFI power saving except while uploading
+BatteryCapacity = 0                            # mAh, for the battery life estimate (0 = none)
+
+# Log file format
+# 'csv' = text, one line per log entry (log.csv)
+# 'bin' = fixed size binary records (log.bin), convert with tools/plog2csv.py
+LogFormat = 'csv'
+
 # Number of active sensors
 ActiveSensors = len(SensorName)
 
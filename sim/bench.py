@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# Benchmarks for PicoLogger, run on a PC with simulated sensors
+#
+# Last changed: 18/10/2026 05:45
+# Last change: Fake Domoticz server in its own process (CPython), so its memory is not counted
+#
+# Usage: python sim/bench.py [cycles]
+#
+# Reports:
+#   - time to run one measurement (start all sensors & collect each phase)
+#   - Domoticz upload time, all sensors in one batch vs one request per sensor
+#   - bytes written per log entry, CSV vs binary log
+#   - memory allocated per measure + log cycle
+# Times are for the PC, compare before / after a change rather than reading
+# them as Pico times. The simulated sensors return straight away, so the
+# measurement time is PicoLogger's own overhead.
+# On CPython the fake Domoticz server is run as a separate process, so the
+# memory figures only include PicoLogger (and the simulated hardware).
+
+import gc
+import os
+import sys
+import time
+
+import simenv
+
+# Function to read a clock in microseconds (real time, not the simulator's clock)...
+if hasattr(time, 'perf_counter'):
+    def Clock():
+        return time.perf_counter() * 1000000
+else:
+    def Clock():
+        return time.ticks_us()
+
+# Function to run func n times, returns the average time in microseconds...
+def Timed(func, n):
+    t0 = Clock()
+    for i in range(n):
+        func()
+    return (Clock() - t0) / n
+
+def Report(name, value, unit):
+    print('{:<36}{:>12.1f} {}'.format(name, value, unit))
+
+# Function to start the fake Domoticz server in its own process, returns (process, 'host:port')...
+def StartServer():
+    import socket
+    import subprocess
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+    server = subprocess.Popen([sys.executable, os.path.join(simenv.SIM, 'fakedomoticz.py'), str(port)],
+                              stdout=subprocess.DEVNULL)
+    for i in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            break
+        except OSError:
+            time.sleep(0.05)    # (real clock, the simulator's is not installed yet)
+    return server, '127.0.0.1:' + str(port)
+
+if __name__ == '__main__':
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    server = None
+    addr = None
+    if not hasattr(gc, 'mem_alloc'):
+        server, addr = StartServer()
+    simenv.setup(domoticz_addr=addr)
+
+    import main
+    import binlog
+    import domoticz
+    import drivers
+    import sensors
+    main.DebugLevel = -1                        # (errors print at level 0)
+    main.wlan = main.network.WLAN(main.network.STA_IF)
+
+    # Measurement (all phases run back to back)
+    def Measure():
+        time.sleep(sensors.MeasurementInterval)    # (simulated clock, so the DHT can be read again)
+        main.MeasureData()
+        while main.Phase < len(main.Phases):
+            main.CollectData()
+        main.Sched.cancel('collect')
+        main.Sched.cancel('led')
+    Report('Measure (all sensors)', Timed(Measure, cycles), 'us')
+
+    # Uploads
+    items = [(d.idx, drivers.FormatValue(main.SensorVal[d.id])) for d in main.Drivers if d.idx != 'x']
+    Report('Upload, one batch of ' + str(len(items)), Timed(lambda: domoticz.Upload(items), cycles), 'us')
+    def Single():
+        for idx, svalue in items:
+            domoticz.Upload([(idx, svalue)])
+    Report('Upload, ' + str(len(items)) + ' single requests', Timed(Single, cycles), 'us')
+    def Reconnect():
+        for idx, svalue in items:
+            for conn in domoticz.Servers:
+                conn.close()
+            domoticz.Upload([(idx, svalue)])
+    Report('Upload, ' + str(len(items)) + ' new connections', Timed(Reconnect, cycles), 'us')
+
+    # Log file bytes per entry
+    main.LogLevel = 1
+    main.LogData()                              # (title line)
+    main.LogHandler.flush()
+    start = os.stat(main.filename)[6]
+    for i in range(cycles):
+        main.LogData()
+    main.LogHandler.flush()
+    Report('CSV log entry', (os.stat(main.filename)[6] - start) / cycles, 'bytes')
+
+    log = binlog.BinLog('bench.bin', drivers.ChannelNames(main.Drivers))
+    values = [None] * len(drivers.ChannelNames(main.Drivers))
+    start = os.stat('bench.bin')[6]
+    for i in range(cycles):
+        log.write(time.time(), i, drivers.ChannelValues(main.Drivers, main.LogVal, values))
+    Report('Binary log entry', (os.stat('bench.bin')[6] - start) / cycles, 'bytes')
+    main.LogLevel = 0
+
+    # Memory allocated per cycle
+    def Cycle():
+        Measure()
+        main.LogData()
+    gc.collect()
+    if hasattr(gc, 'mem_alloc'):
+        # MicroPython - memory still in use after the cycles (garbage is not collected)
+        gc.disable()
+        before = gc.mem_alloc()
+        for i in range(cycles):
+            Cycle()
+        Report('Allocated per cycle', (gc.mem_alloc() - before) / cycles, 'bytes')
+        gc.enable()
+    else:
+        import tracemalloc
+        tracemalloc.start()
+        for i in range(cycles):
+            Cycle()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        Report('Peak allocated during cycles', peak, 'bytes')
+        Report('Retained per cycle', current / cycles, 'bytes')
+
+    if server is not None:
+        server.terminate()
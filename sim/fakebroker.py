@@ -0,0 +1,112 @@
+# Fake MQTT broker for running PicoLogger on a PC
+#
+# Last changed: 18/10/2026 08:30
+# Last change: Offline - connections are dropped during the simulated WIFI outage
+#
+# Accepts the MQTT 3.1.1 connection made by mqtt.py, acknowledges each
+# PUBLISH (QoS 1) & PINGREQ and remembers the Domoticz updates published to
+# domoticz/in. It does not forward messages to subscribers. Run it on its own
+# to use it with the MicroPython unix port:  python3 sim/fakebroker.py 1883
+
+import json
+import socket
+import socketserver
+import sys
+import threading
+
+# Updates received, [(idx, svalue), ...]
+Received = []
+
+# Set to True to make the broker drop connections (simulates a broker failure)
+Down = False
+
+# Function returning True while the broker cannot be reached (None = always reachable)
+# simenv sets it to hw.offline, so open connections are dropped during the WIFI outage
+Offline = None
+
+def _down():
+    return Down or (Offline is not None and Offline())
+
+# Set to True to print each update received
+Verbose = False
+
+# Number of connections & pings received
+Connects = 0
+Pings = 0
+
+class Handler(socketserver.BaseRequestHandler):
+    def read(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self.request.recv(n - len(data))
+            if not chunk:
+                raise EOFError
+            data += chunk
+        return data
+
+    # Read one packet, returns (type & flags, body)
+    def packet(self):
+        kind = self.read(1)[0]
+        length = 0
+        shift = 0
+        while True:
+            byte = self.read(1)[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        return kind, self.read(length)
+
+    def handle(self):
+        global Connects, Pings
+        # Send each PUBACK straight away (avoids delayed ACK stalls)
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while not _down():
+                kind, body = self.packet()
+                if _down():
+                    break
+                if kind >> 4 == 1:                       # CONNECT
+                    Connects += 1
+                    self.request.sendall(b'\x20\x02\x00\x00')
+                elif kind >> 4 == 3:                     # PUBLISH
+                    n = (body[0] << 8) | body[1]
+                    topic = body[2:2 + n].decode()
+                    payload = body[2 + n:]
+                    qos = (kind >> 1) & 3
+                    if qos:
+                        pid = payload[:2]
+                        payload = payload[2:]
+                        self.request.sendall(b'\x40\x02' + pid)
+                    if topic == 'domoticz/in':
+                        update = json.loads(payload)
+                        Received.append((str(update['idx']), update['svalue']))
+                        if Verbose:
+                            print('idx ' + Received[-1][0] + ' = ' + Received[-1][1])
+                elif kind >> 4 == 12:                    # PINGREQ
+                    Pings += 1
+                    self.request.sendall(b'\xd0\x00')
+                elif kind >> 4 == 14:                    # DISCONNECT
+                    break
+        except (EOFError, OSError):
+            pass
+
+class Broker(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+# Start the broker in a background thread, returns the server (server_address has the port)
+def start(port=0):
+    server = Broker(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1883
+    Verbose = True
+    server = Broker(('127.0.0.1', port), Handler)
+    print('Fake MQTT broker listening on port ' + str(port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(str(len(Received)) + ' updates received')
@@ -0,0 +1,83 @@
+# Fake Domoticz server for running PicoLogger on a PC
+#
+# Last changed: 18/10/2026 09:00
+# Last change: Rejected updates are answered like Domoticz does (HTTP 200, "status" : "ERR")
+#
+# Answers the json.htm udevice requests sent by domoticz.py (HTTP/1.1 with
+# keep-alive) and remembers them. Run it on its own to use it with the
+# MicroPython unix port:  python3 sim/fakedomoticz.py 8085
+
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Requests received, [(idx, svalue), ...]
+Received = []
+
+# Set to True to make the server refuse requests (simulates a server failure)
+Down = False
+
+# Function returning True while the server cannot be reached (None = always reachable)
+# simenv sets it to hw.offline, so open connections are dropped during the WIFI outage
+Offline = None
+
+# Set to True to print each update received
+Verbose = False
+
+# Extra time (seconds) taken to answer each request
+Delay = 0.0
+
+# idx values answered with "status" : "ERR" (simulates a rejected update, e.g. an unknown idx)
+Rejected = set()
+
+# Number of requests answered
+Requests = 0
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send each response in one packet (avoids delayed ACK stalls on keep-alive connections)
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        global Requests
+        if Down or (Offline is not None and Offline()):
+            self.close_connection = True
+            return
+        if Delay:
+            threading.Event().wait(Delay)  # (time.sleep may be the simulator's virtual clock)
+        Requests += 1
+        query = parse_qs(urlparse(self.path).query)
+        if query.get('idx', [''])[0] in Rejected:
+            body = b'{\n   "status" : "ERR"\n}\n'
+        else:
+            Received.append((query.get('idx', [''])[0], query.get('svalue', [''])[0]))
+            if Verbose:
+                print('idx ' + Received[-1][0] + ' = ' + Received[-1][1])
+            body = b'{\n   "status" : "OK",\n   "title" : "Update Device"\n}\n'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+# Start the server in a background thread, returns the server (server_address has the port)
+def start(port=0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8085
+    Verbose = True
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    print('Fake Domoticz listening on port ' + str(port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(str(len(Received)) + ' updates received')
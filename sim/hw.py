@@ -0,0 +1,130 @@
+# Simulated hardware & virtual clock for running PicoLogger on a PC
+#
+# Last changed: 18/10/2026 08:30
+# Last change: offline() - the WIFI outage also stops connections (see simenv)
+#
+# install() adds the MicroPython time functions (ticks_ms, sleep_ms...) to
+# CPython's time module, driven by a virtual clock. Sleeping advances the
+# clock instantly, so hours of logging run in seconds. While the clock
+# advances, edges are generated on the simulated PIR / IOR / Counter pins.
+#
+# install(False) uses the real clock instead (needed when more than one
+# thread is running, e.g. sensors.DualCore). On the MicroPython unix port
+# the real clock is always used (the time module cannot be patched there).
+
+import math
+import random
+import sys
+import time
+
+# Virtual clock (seconds since start) & the wall clock time it started at
+now = 0.0
+epoch = 1760000000
+virtual = False
+_start = None    # time.monotonic() at install() when the real clock is used
+
+# Simulated WIFI is down between these times, (from, until) seconds (None = never)
+wifi_down = None
+
+# Edge rate (per second) for each simulated input pin, {pin: rate}
+edge_rate = {}
+
+# Pins with an IRQ handler, {pin id: machine.Pin}
+irq_pins = {}
+
+# Sensors that stop responding, {pin: (from, until)} in seconds
+dead = {}
+
+# Number of 1-wire devices on each simulated bus, {pin: count} (default 1)
+t1w_devices = {}
+
+_PERIOD = 1 << 30
+
+def _ticks_add(a, b):
+    return (a + b) % _PERIOD
+
+def _ticks_diff(a, b):
+    return ((a - b + _PERIOD // 2) % _PERIOD) - _PERIOD // 2
+
+def _advance(seconds):
+    global now
+    if seconds <= 0:
+        return
+    # Fire the edges due during this step
+    for pin_id in irq_pins:
+        rate = edge_rate.get(pin_id, 0)
+        if rate <= 0:
+            continue
+        pin = irq_pins[pin_id]
+        t = _interval(rate)
+        while t < seconds:
+            now_save = now
+            now = now_save + t
+            pin.fire()
+            now = now_save
+            t += _interval(rate)
+    now += seconds
+
+# True if the sensor on pin is not responding now
+def failed(pin):
+    if pin not in dead:
+        return False
+    start, end = dead[pin]
+    return start <= seconds() < end
+
+# True while the simulated WIFI is down
+def offline():
+    return wifi_down is not None and wifi_down[0] <= seconds() < wifi_down[1]
+
+# Seconds since the simulation started (virtual or real clock)
+def seconds():
+    return now if _start is None else time.monotonic() - _start
+
+# Random time to the next edge (Poisson arrivals)
+def _interval(rate):
+    return -math.log(1.0 - random.random()) / rate
+
+def ticks_ms():
+    return int(now * 1000) % _PERIOD
+
+def ticks_us():
+    return int(now * 1000000) % _PERIOD
+
+def install(use_virtual=True):
+    global virtual, _start
+    if sys.implementation.name == 'micropython':
+        return
+    if use_virtual:
+        virtual = True
+        time.time = lambda: epoch + int(now)
+        time.sleep = lambda s: _advance(s)
+        time.sleep_ms = lambda ms: _advance(ms / 1000)
+        time.sleep_us = lambda us: _advance(us / 1000000)
+        time.ticks_ms = ticks_ms
+        time.ticks_us = ticks_us
+    else:
+        sleep = time.sleep
+        _start = time.monotonic()
+        time.time = lambda: epoch + int(seconds())
+        time.sleep_ms = lambda ms: sleep(ms / 1000)
+        time.sleep_us = lambda us: sleep(us / 1000000)
+        time.ticks_ms = lambda: int(seconds() * 1000) % _PERIOD
+        time.ticks_us = lambda: int(seconds() * 1000000) % _PERIOD
+    time.ticks_cpu = time.ticks_us
+    time.ticks_add = _ticks_add
+    time.ticks_diff = _ticks_diff
+    if not hasattr(sys, 'print_exception'):
+        import traceback
+        sys.print_exception = lambda e, f=sys.stdout: traceback.print_exception(type(e), e, e.__traceback__, file=f)
+
+# Slowly changing simulated value (random walk around centre)
+class Signal:
+    def __init__(self, centre, step):
+        self.centre = centre
+        self.step = step
+        self.value = centre
+
+    def read(self):
+        self.value += random.uniform(-self.step, self.step)
+        self.value += (self.centre - self.value) * 0.05
+        return self.value
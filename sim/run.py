@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# Run PicoLogger on a PC with simulated sensors & a fake Domoticz server (or MQTT broker)
+#
+# Last changed: 18/10/2026 08:30
+# Last change: The WIFI outage also cuts off the server (updates are spooled & replayed)
+#
+# Usage: python sim/run.py [hours] [host:port]
+# hours     - simulated run time (default 2), with a 5 minute WIFI outage half way
+#             (no connections can be made during it, see simenv.py)
+# host:port - send to a real / external Domoticz server (or MQTT broker) instead of the fake one
+#
+# The sensor configuration is in sim/simconfig.py. Output (log.csv, spool.bin...)
+# is written to sim_output in the current folder.
+
+import sys
+import time
+
+import simenv
+
+if __name__ == '__main__':
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    simenv.setup(domoticz_addr=sys.argv[2] if len(sys.argv) > 2 else None)
+
+    import hw
+    hw.wifi_down = (hours * 1800, hours * 1800 + 300)
+    started = time.perf_counter() if hasattr(time, 'perf_counter') else 0
+
+    import main
+    main.HttpPort = 0       # (the web server waits in real time, not on the simulated clock)
+    main.Sched.once('end', main.Sched.stop, int(hours * 3600000))
+    try:
+        main.Run()
+    except SystemExit:
+        pass
+
+    print('Simulated', round(hw.seconds() / 3600, 2), 'hours in',
+          round(time.perf_counter() - started, 1) if started else '?', 'seconds')
+    print('Scheduler:', main.Sched.stats())
+    print('Domoticz:', main.Uplink.Stats())
+    print('WIFI:', main.Wifi.stats())
+    print('Spool:', main.Spool.stats())
+    print('Deadband:', main.Band.stats())
+    print('Power:', main.Power.stats())
+    if simenv.Fake is not None:
+        print('Updates received:', len(simenv.Fake.Received))
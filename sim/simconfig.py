@@ -0,0 +1,38 @@
+# Sensor configuration used by the simulator (replaces the values in sensors.py)
+#
+# Last changed: 18/10/2026 03:30
+# Last change: Transport can be set ('mqtt' uses the fake broker)
+
+import hw
+
+SensorName = ['Temp1', 'Temp2', 'Light', 'Motion', 'Door', 'Climate', 'Humidity']
+SensorType = ['T1w', 'T1w', 'Analogue', 'PIR', 'IOR', 'DHT22_TH', 'DHT22_H']
+SensorLoc = [4, 5, 26, 14, 15, 16, 16]      # (Climate & Humidity share one DHT22)
+DomoticzIDX = ['101', '102', 'x', '103', '104', '105', '106']
+MeasurementInterval = 5
+LogInterval = 60
+NumReadings = 0
+T1wResolution = [10, 12, 12, 12, 12, 12, 12]
+Deadband = [0.2, 0.2, 0, 0, 0, 1, 1]
+DeadbandPct = [0, 0, 5, 0, 0, 0, 0]
+ADCSamples = [1, 1, 64, 1, 1, 1, 1]
+Transport = 'http'                          # 'mqtt' sends the updates to the fake MQTT broker
+
+# Simulated hardware
+hw.edge_rate = {14: 0.02, 15: 0.005}      # PIR & IOR edges per second
+hw.t1w_devices = {4: 1, 5: 1}
+hw.dead = {16: (1800, 3000)}               # DHT stops responding for 20 minutes
+
+# Function to copy this configuration into the sensors module...
+# Per-sensor arrays not given above are filled with the first entry from sensors.py
+def apply(sensors):
+    n = len(SensorName)
+    for name in ('SensorName', 'SensorType', 'SensorLoc', 'DomoticzIDX',
+                 'T1wResolution', 'Deadband', 'DeadbandPct', 'ADCSamples',
+                 'MeasurementInterval', 'LogInterval', 'NumReadings', 'Transport'):
+        setattr(sensors, name, globals()[name])
+    for name in dir(sensors):
+        value = getattr(sensors, name)
+        if isinstance(value, list) and len(value) != n and name not in globals():
+            setattr(sensors, name, [value[0]] * n)
+    sensors.ActiveSensors = n
@@ -0,0 +1,77 @@
+# Environment for running PicoLogger on a PC (used by run.py & bench.py)
+#
+# Last changed: 18/10/2026 08:30
+# Last change: No connections can be made during the simulated WIFI outage
+#
+# setup() puts the stand-in modules (sim/stubs) and the PicoLogger folder on
+# sys.path, installs the virtual clock, applies simconfig.py to sensors.py
+# and points domoticz.py at a fake Domoticz server (or mqtt.py at a fake
+# broker, see Transport in simconfig.py).
+#
+# While the simulated WIFI is down (hw.wifi_down) new connections fail and the
+# fake server / broker drops the ones that are open, so the uploads fail over,
+# are spooled and replayed as they would be on the Pico.
+
+import os
+import sys
+
+SIM = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SIM)
+
+# Fake Domoticz server / MQTT broker started by setup() (None if an external server is used)
+# and its module (fakedomoticz or fakebroker, which has the updates Received)
+Server = None
+Fake = None
+
+# Function to make socket connections fail while the simulated WIFI is down...
+# (CPython only, the MicroPython unix port's socket cannot be patched)
+def Unplug(hw):
+    import socket
+    if not hasattr(socket, 'create_connection') or hasattr(socket.socket, '_sim_connect'):
+        return
+    connect = socket.socket.connect
+    def Connect(sock, addr):
+        if hw.offline():
+            raise OSError(113, 'No route to host (simulated WIFI outage)')
+        return connect(sock, addr)
+    socket.socket._sim_connect = connect
+    socket.socket.connect = Connect
+
+def setup(out='sim_output', domoticz_addr=None):
+    global Server, Fake
+    for path in (ROOT, os.path.join(SIM, 'stubs'), SIM):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    # The PicoLogger folder must come first so its logging.py is used
+    sys.path.remove(ROOT)
+    sys.path.insert(0, ROOT)
+
+    import hw
+    import sensors
+    import simconfig
+    simconfig.apply(sensors)
+    # The simulated clock only works with one thread
+    hw.install(not sensors.DualCore)
+    Unplug(hw)
+
+    if domoticz_addr is None:
+        if sensors.Transport == 'mqtt':
+            import fakebroker as Fake
+        else:
+            import fakedomoticz as Fake
+        Fake.Offline = hw.offline
+        Server = Fake.start()
+        host, port = Server.server_address
+    else:
+        host, port = domoticz_addr.split(':')
+    if sensors.Transport == 'mqtt':
+        sensors.MqttBroker = host
+        sensors.MqttPort = int(port)
+    else:
+        import domoticz
+        # Second server is unreachable, to exercise the failover
+        domoticz.Servers = [domoticz.Connection(host, port), domoticz.Connection('127.0.0.1', 1)]
+
+    if not os.path.exists(out):
+        os.mkdir(out)
+    os.chdir(out)
@@ -0,0 +1,40 @@
+# Stand-in for the MicroPython dht module (simulator only)
+
+import hw
+
+class DHTBase:
+    min_interval = 1.0
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.t = hw.Signal(21, 0.1)
+        self.h = hw.Signal(55, 0.5)
+        self.last = None
+        self.measures = 0
+
+    def measure(self):
+        if hw.failed(self.pin.id):
+            raise OSError(110)
+        # The real sensor fails if it is read too often
+        if self.last is not None and hw.seconds() - self.last < self.min_interval:
+            raise OSError(116)
+        self.last = hw.seconds()
+        self.measures += 1
+        self._t = self.t.read()
+        self._h = self.h.read()
+
+class DHT11(DHTBase):
+    def temperature(self):
+        return int(self._t)
+
+    def humidity(self):
+        return int(self._h)
+
+class DHT22(DHTBase):
+    min_interval = 2.0
+
+    def temperature(self):
+        return round(self._t, 1)
+
+    def humidity(self):
+        return round(self._h, 1)
@@ -0,0 +1,36 @@
+# Stand-in for the MicroPython ds18x20 module (simulator only)
+# Each bus has hw.t1w_devices[pin] devices (default 1) giving a simulated temperature
+
+import hw
+
+class DS18X20:
+    def __init__(self, onewire):
+        self.ow = onewire
+        pin = onewire.pin.id
+        count = hw.t1w_devices.get(pin, 1)
+        self.roms = [bytearray([0x28, pin, n, 0, 0, 0, 0, 0x5A]) for n in range(count)]
+        self.signals = {bytes(rom): hw.Signal(18 + 2 * n, 0.05) for n, rom in enumerate(self.roms)}
+        self.config = {bytes(rom): 0x7F for rom in self.roms}
+        self.converted = None
+
+    def scan(self):
+        return [bytearray(rom) for rom in self.roms]
+
+    def convert_temp(self):
+        self.converted = hw.seconds()
+
+    def read_scratch(self, rom):
+        # A ROM with no device reads all 0xFF, which fails the CRC check
+        if bytes(rom) not in self.config or hw.failed(self.ow.pin.id):
+            raise Exception('CRC error')
+        return bytearray([0x50, 0x05, 0x4B, 0x46, self.config[bytes(rom)], 0xFF, 0x0C, 0x10, 0x1C])
+
+    def write_scratch(self, rom, buf):
+        self.config[bytes(rom)] = buf[2]
+
+    def read_temp(self, rom):
+        if bytes(rom) not in self.signals or hw.failed(self.ow.pin.id):
+            raise Exception('CRC error')
+        bits = 9 + (self.config[bytes(rom)] >> 5)
+        step = 0.5 / (1 << (bits - 9))
+        return round(self.signals[bytes(rom)].read() / step) * step
@@ -0,0 +1,79 @@
+# Stand-in for the MicroPython machine module (simulator only)
+
+import hw
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self._value = 0 if value is None else value
+        self.handler = None
+
+    def init(self, *args, **kwargs):
+        pass
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def toggle(self):
+        self._value = 1 - self._value
+
+    def irq(self, handler=None, trigger=IRQ_RISING | IRQ_FALLING, hard=False, wake=None):
+        self.handler = handler
+        hw.irq_pins[self.id] = self
+
+    # Simulate an edge on this pin
+    def fire(self):
+        if self.handler is not None:
+            self.handler(self)
+
+
+class ADC:
+    CORE_TEMP = 4
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.signal = hw.Signal(30000, 200)
+
+    def read_u16(self):
+        return max(0, min(65535, int(self.signal.read())))
+
+
+def disable_irq():
+    return 0
+
+def enable_irq(state=0):
+    pass
+
+def lightsleep(ms=None):
+    import time
+    time.sleep_ms(ms or 0)
+
+def deepsleep(ms=None):
+    reset()
+
+def idle():
+    pass
+
+def freq(hz=None):
+    return 125000000
+
+def unique_id():
+    return b'\xe6\x61\x38\x00\x00\x00\x00\x01'
+
+def reset():
+    raise SystemExit('machine.reset()')
@@ -0,0 +1,13 @@
+# Stand-in for the MicroPython micropython module (simulator only)
+
+def const(x):
+    return x
+
+def native(f):
+    return f
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+def mem_info(*args):
+    pass
@@ -0,0 +1,59 @@
+# Stand-in for the MicroPython network module (simulator only)
+# The connection drops out while hw.wifi_down is (from, until) seconds, and
+# joining a network takes JoinTime seconds
+
+import hw
+
+STA_IF = 0
+AP_IF = 1
+STAT_IDLE = 0
+STAT_CONNECTING = 1
+STAT_GOT_IP = 3
+
+JoinTime = 2.0
+
+class WLAN:
+    PM_NONE = 0x10
+    PM_PERFORMANCE = 0xA11140
+    PM_POWERSAVE = 0x111022
+
+    def __init__(self, interface=STA_IF):
+        self.interface = interface
+        self._active = False
+        self._connected = False
+        self._joined = 0.0
+        self._config = {'mac': b'\x28\xcd\xc1\x00\x00\x01', 'pm': self.PM_PERFORMANCE, 'ssid': '', 'channel': 6}
+
+    def active(self, state=None):
+        if state is None:
+            return self._active
+        self._active = state
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config[args[0]]
+        self._config.update(kwargs)
+
+    def connect(self, ssid=None, key=None, bssid=None):
+        self._config['ssid'] = ssid
+        self._connected = True
+        self._joined = hw.seconds() + JoinTime
+
+    def disconnect(self):
+        self._connected = False
+
+    def isconnected(self):
+        if hw.offline():
+            self._connected = False
+        return self._connected and hw.seconds() >= self._joined
+
+    def status(self, param=None):
+        if param == 'rssi':
+            return -60
+        return STAT_GOT_IP if self.isconnected() else STAT_IDLE
+
+    def ifconfig(self, config=None):
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
+
+    def scan(self):
+        return [(self._config['ssid'].encode(), b'\x00\x11\x22\x33\x44\x55', 6, -60, 3, 0)]
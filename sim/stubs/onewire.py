@@ -0,0 +1,8 @@
+# Stand-in for the MicroPython onewire module (simulator only)
+
+class OneWireError(Exception):
+    pass
+
+class OneWire:
+    def __init__(self, pin):
+        self.pin = pin
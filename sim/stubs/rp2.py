@@ -0,0 +1,4 @@
+# Stand-in for the MicroPython rp2 module (simulator only)
+
+def country(code=None):
+    return code
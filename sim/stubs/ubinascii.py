@@ -0,0 +1,12 @@
+# Stand-in for the MicroPython ubinascii module (simulator only)
+
+import binascii
+
+unhexlify = binascii.unhexlify
+a2b_base64 = binascii.a2b_base64
+b2a_base64 = binascii.b2a_base64
+
+def hexlify(data, sep=None):
+    if sep:
+        return binascii.hexlify(data, sep)
+    return binascii.hexlify(data)
@@ -0,0 +1,30 @@
+# Stand-in for the MicroPython urequests module (simulator only)
+
+import urllib.request
+
+class Response:
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+        self.text = content.decode()
+
+    def json(self):
+        import json
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+def request(method, url, data=None, json=None, headers={}, timeout=None):
+    if json is not None:
+        import json as _json
+        data = _json.dumps(json).encode()
+    req = urllib.request.Request(url, data=data, headers=headers, method=method)
+    with urllib.request.urlopen(req, timeout=timeout) as r:
+        return Response(r.status, r.read())
+
+def get(url, **kw):
+    return request('GET', url, **kw)
+
+def post(url, **kw):
+    return request('POST', url, **kw)
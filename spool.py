@@ -0,0 +1,110 @@
+# Store & forward queue for Domoticz updates (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 05:15
+# Last change: A batch is removed once the server has answered, even if it rejected some updates
+#
+# Updates that could not be sent are kept in a fixed size ring buffer in a
+# file on flash, so they survive a reset. Once the server can be reached
+# again the backlog is replayed, oldest first, in batches.
+#
+# File layout: header, then 'slots' fixed size records
+#   header: magic, slots, head, count, drops
+#   record: timestamp, idx, svalue (padded with zeros)
+
+import struct
+import time
+
+_MAGIC = b'PLSQ'
+_HEADER = '<4sHHHI'
+_HEADER_SIZE = struct.calcsize(_HEADER)
+_RECORD = '<IH26s'
+_RECORD_SIZE = struct.calcsize(_RECORD)
+
+class Spool:
+    def __init__(self, filename='spool.bin', slots=512):
+        self.filename = filename
+        self.slots = slots
+        self.head = 0
+        self.count = 0
+        self.drops = 0           # Oldest records overwritten because the queue was full
+        self.replayed = 0        # Records sent from the queue
+        self.replay_ms = 0       # Time spent sending them
+        self.record = bytearray(_RECORD_SIZE)
+        try:
+            self.file = open(filename, 'r+b')
+            magic, slots, head, count, drops = struct.unpack(_HEADER, self.file.read(_HEADER_SIZE))
+            if magic != _MAGIC or slots != self.slots:
+                raise ValueError
+            self.head, self.count, self.drops = head, count, drops
+        except:
+            self.create()
+
+    # Create an empty queue file (all the slots are written so the file does not need to grow later)
+    def create(self):
+        self.file = open(self.filename, 'w+b')
+        self.head = 0
+        self.count = 0
+        self.file.write(struct.pack(_HEADER, _MAGIC, self.slots, 0, 0, self.drops))
+        for i in range(self.slots):
+            self.file.write(self.record)
+        self.file.flush()
+
+    def _write_header(self):
+        self.file.seek(0)
+        self.file.write(struct.pack(_HEADER, _MAGIC, self.slots, self.head, self.count, self.drops))
+        self.file.flush()
+
+    # Add [(idx, svalue), ...] taken at time ts, the oldest records are dropped if the queue is full
+    def put(self, ts, items):
+        for idx, svalue in items:
+            if self.count == self.slots:
+                self.head = (self.head + 1) % self.slots
+                self.count -= 1
+                self.drops += 1
+            slot = (self.head + self.count) % self.slots
+            struct.pack_into(_RECORD, self.record, 0, ts, int(idx), svalue.encode()[:26])
+            self.file.seek(_HEADER_SIZE + slot * _RECORD_SIZE)
+            self.file.write(self.record)
+            self.count += 1
+        self._write_header()
+
+    # Return up to n of the oldest records as [(ts, idx, svalue), ...] without removing them
+    def peek(self, n):
+        records = []
+        for i in range(min(n, self.count)):
+            slot = (self.head + i) % self.slots
+            self.file.seek(_HEADER_SIZE + slot * _RECORD_SIZE)
+            self.file.readinto(self.record)
+            ts, idx, svalue = struct.unpack(_RECORD, self.record)
+            records.append((ts, str(idx), svalue.rstrip(b'\0').decode()))
+        return records
+
+    # Remove the n oldest records
+    def pop(self, n):
+        n = min(n, self.count)
+        self.head = (self.head + n) % self.slots
+        self.count -= n
+        self._write_header()
+
+    # Send up to n of the oldest records with send([(idx, svalue), ...]), returns the status from send()
+    # The records are removed if the status is in answered (the server was reached - updates
+    # it rejected are dropped rather than sent again)
+    def replay(self, send, n, answered=('OK',)):
+        records = self.peek(n)
+        if not records:
+            return 'OK'
+        t = time.ticks_ms()
+        sts = send([(idx, svalue) for ts, idx, svalue in records])
+        if sts in answered:
+            self.pop(len(records))
+            self.replayed += len(records)
+            self.replay_ms += time.ticks_diff(time.ticks_ms(), t)
+        return sts
+
+    def stats(self):
+        return {
+            'depth': self.count,
+            'drops': self.drops,
+            'replayed': self.replayed,
+            'replay_per_s': round(1000 * self.replayed / self.replay_ms, 1) if self.replay_ms else 0,
+        }
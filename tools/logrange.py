@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# Print the part of a PicoLogger log file (log.csv, log.csv.1, ...) covering a time range
+# Runs on the host (not on the Pico)
+#
+# Last changed: 18/10/2026 09:30
+# Last change: Timestamps are converted from the device's epoch (recorded in the .idx file)
+#
+# Usage: python logrange.py log.csv start [end]
+# start / end are 'YYYY-MM-DD HH:MM:SS' (UTC) or seconds since 1970
+#
+# The .idx file next to each log file holds "timestamp,offset" checkpoints,
+# so only the part of each file between the checkpoints either side of the
+# range is read. Output starts at the checkpoint before start and ends at the
+# checkpoint after end.
+#
+# The checkpoint timestamps are the Pico's time.time(), counted from the epoch
+# year on the "epoch,year" line at the start of the .idx file (2000 on some
+# MicroPython ports). Index files without that line are taken to use 1970.
+
+import calendar
+import os
+import sys
+import time
+
+# Function to convert a time argument to seconds since 1970...
+def parse_time(text):
+    try:
+        return int(text)
+    except ValueError:
+        return calendar.timegm(time.strptime(text, '%Y-%m-%d %H:%M:%S'))
+
+# Function to read the checkpoints for a log file, returns [(timestamp, offset), ...]...
+# (timestamps converted to seconds since 1970)
+def read_index(filename):
+    index = []
+    offset = 0
+    try:
+        with open(filename + '.idx') as f:
+            for line in f:
+                if line.strip():
+                    t, o = line.split(',')
+                    if t == 'epoch':
+                        offset = calendar.timegm((int(o), 1, 1, 0, 0, 0))
+                        continue
+                    index.append((int(t) + offset, int(o)))
+    except OSError:
+        pass
+    return index
+
+# Function to return the log files, oldest first...
+def segments(filename):
+    names = []
+    i = 1
+    while os.path.exists(filename + '.' + str(i)):
+        names.insert(0, filename + '.' + str(i))
+        i += 1
+    if os.path.exists(filename):
+        names.append(filename)
+    return names
+
+def extract(filename, start, end, out):
+    names = segments(filename)
+    indexes = [read_index(name) for name in names]
+    for n in range(len(names)):
+        index = indexes[n]
+        if index and index[0][0] > end:
+            break
+        # Skip files that end before start (the next file starts before it)
+        if n + 1 < len(names) and indexes[n + 1] and indexes[n + 1][0][0] <= start:
+            continue
+        first = 0
+        last = None
+        for t, o in index:
+            if t <= start:
+                first = o
+            elif t > end:
+                last = o
+                break
+        with open(names[n], 'rb') as f:
+            f.seek(first)
+            data = f.read() if last is None else f.read(last - first)
+        out.write(data.decode('utf-8', 'replace'))
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        print('Usage: python logrange.py log.csv start [end]')
+        sys.exit(1)
+    start = parse_time(sys.argv[2])
+    end = parse_time(sys.argv[3]) if len(sys.argv) > 3 else 2 ** 32
+    extract(sys.argv[1], start, end, sys.stdout)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# Convert a PicoLogger binary log (log.bin) to CSV
+# Runs on the host (not on the Pico)
+#
+# Last changed: 17/10/2026 16:00
+# Last change: First version
+#
+# Usage: python plog2csv.py log.bin [log.csv]
+# (writes to stdout if no output file is given)
+
+import calendar
+import math
+import struct
+import sys
+import time
+
+_MAGIC = b'PLOG'
+_HEADER = '<4sBHBH'
+_HEADER_SIZE = struct.calcsize(_HEADER)
+
+# Function to read the header, returns (epoch year, channel names)...
+def read_header(f):
+    magic, version, epoch, channels, length = struct.unpack(_HEADER, f.read(_HEADER_SIZE))
+    if magic != _MAGIC:
+        raise ValueError('Not a PicoLogger binary log')
+    if version != 1:
+        raise ValueError('Unsupported log version: ' + str(version))
+    names = f.read(length).decode().split(',')
+    if len(names) != channels:
+        raise ValueError('Header is corrupt')
+    return epoch, names
+
+# Function to return (timestamp, reading, values) for each record...
+def read_records(f, channels):
+    record = struct.Struct('<II' + str(channels) + 'f')
+    while True:
+        data = f.read(record.size)
+        if len(data) < record.size:
+            break
+        values = record.unpack(data)
+        yield values[0], values[1], values[2:]
+
+def convert(src, dst):
+    with open(src, 'rb') as f:
+        epoch, names = read_header(f)
+        offset = calendar.timegm((epoch, 1, 1, 0, 0, 0))
+        dst.write('Date / Time,Reading,' + ','.join(names) + '\n')
+        for ts, reading, values in read_records(f, len(names)):
+            row = [time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts + offset)), str(reading)]
+            for v in values:
+                row.append('' if math.isnan(v) else '%g' % v)
+            dst.write(','.join(row) + '\n')
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('Usage: python plog2csv.py log.bin [log.csv]')
+        sys.exit(1)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], 'w') as out:
+            convert(sys.argv[1], out)
+    else:
+        convert(sys.argv[1], sys.stdout)
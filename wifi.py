@@ -0,0 +1,199 @@
+# WIFI connection manager for PicoLogger (Raspberry Pi Pico version)
+#
+# Last changed: 18/10/2026 07:00
+# Last change: Only scan for the BSSID when it is not already cached for the network
+#
+# poll() is run regularly by the scheduler. If the connection drops it
+# reconnects in the background, one network at a time, while the sensors
+# carry on being measured (uploads are queued meanwhile, see spool.py).
+#
+# The network last joined (SSID, BSSID, channel & IP settings) is kept in
+# CacheFile and tried first, with its BSSID, so rejoining is quick. Then
+# each network in secrets.py is tried in turn.
+
+import json
+import time
+import ubinascii
+import metrics
+
+CacheFile = 'wifi.json'
+
+# Time allowed to join each network (ms)
+ConnectTimeout = 10000
+
+# IP settings: None = DHCP, 'cached' = re-use the address DHCP gave last time
+# (faster, but the address must not be given to anything else), or a fixed
+# ('ip', 'netmask', 'gateway', 'dns')
+StaticIP = None
+
+class Manager:
+    def __init__(self, wlan, networks, log):
+        self.wlan = wlan
+        self.networks = networks                 # [(ssid, password), ...] in the order to try them
+        self.log = log
+        self.cache = self.load()
+        self.state = 'down'                      # 'down', 'connecting' or 'up'
+        self.attempt = -1                        # Index of the network being tried (-1 = cached network)
+        self.started = time.ticks_ms()           # When the current attempt started
+        self.lost_at = time.ticks_ms()           # When the connection was lost
+        self.static = False                      # Static IP settings applied
+        self.connects = 0
+        self.outages = 0
+        self.outage_ms = 0                       # Length of the last outage
+        self.outage_max = 0
+        self.connect_ms = 0                      # Time the last connection took
+
+    def load(self):
+        try:
+            with open(CacheFile) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    # Remember the network just joined
+    def save(self, ssid):
+        bssid = None
+        channel = None
+        try:
+            bssid = self.wlan.config('bssid')
+            channel = self.wlan.config('channel')
+        except (ValueError, KeyError, OSError):
+            pass
+        if bssid is None and self.cache.get('ssid') == ssid and self.cache.get('bssid'):
+            # Not available from the driver - keep the cached access point (a scan blocks for seconds)
+            bssid = ubinascii.unhexlify(self.cache['bssid'])
+            channel = self.cache.get('channel')
+        elif bssid is None:
+            # Not available from the driver & a new network - find the strongest access point for ssid
+            try:
+                best = None
+                for ap in self.wlan.scan():
+                    if ap[0].decode() == ssid and (best is None or ap[3] > best[3]):
+                        best = ap
+                if best is not None:
+                    bssid = best[1]
+                    channel = best[2]
+            except OSError:
+                pass
+        cache = {
+            'ssid': ssid,
+            'bssid': ubinascii.hexlify(bssid).decode() if bssid else None,
+            'channel': channel,
+            'ifconfig': list(self.wlan.ifconfig()),
+        }
+        if cache != self.cache:
+            self.cache = cache
+            try:
+                with open(CacheFile, 'w') as f:
+                    json.dump(cache, f)
+            except OSError as e:
+                self.log('WIFI cache not saved: ' + str(e), 1, 0)
+
+    # Start joining network n (-1 = the cached network, using its BSSID)
+    def join(self, n):
+        self.attempt = n
+        self.state = 'connecting'
+        self.started = time.ticks_ms()
+        if n < 0:
+            ssid = self.cache['ssid']
+            pw = self.password(ssid)
+            bssid = ubinascii.unhexlify(self.cache['bssid']) if self.cache.get('bssid') else None
+        else:
+            ssid, pw = self.networks[n]
+            bssid = None
+
+        # IP settings
+        config = StaticIP
+        if config == 'cached':
+            config = self.cache.get('ifconfig') if n < 0 else None
+        try:
+            if config:
+                self.wlan.ifconfig(tuple(config))
+                self.static = True
+            elif self.static:
+                self.wlan.ifconfig('dhcp')
+                self.static = False
+        except (ValueError, TypeError, OSError):
+            pass
+
+        self.log('Joining ' + ssid + ('' if bssid is None else ' (' + self.cache['bssid'] + ')'), 1, 1)
+        try:
+            self.wlan.disconnect()
+            if bssid is None:
+                self.wlan.connect(ssid, pw)
+            else:
+                self.wlan.connect(ssid, pw, bssid=bssid)
+        except OSError as e:
+            self.log('WIFI connect failed: ' + str(e), 1, 0)
+
+    def password(self, ssid):
+        for s, pw in self.networks:
+            if s == ssid:
+                return pw
+        return None
+
+    # Index of the first network to try (the cached one if it is still in secrets.py)
+    def first(self):
+        if self.cache.get('ssid') and self.password(self.cache['ssid']) is not None:
+            return -1
+        return 0
+
+    # Look after the connection, returns True if connected (never waits)
+    def poll(self):
+        now = time.ticks_ms()
+        if self.wlan.isconnected():
+            if self.state != 'up':
+                self.connected(now)
+            return True
+
+        if self.state == 'up':
+            self.state = 'down'
+            self.lost_at = now
+            self.outages += 1
+            metrics.inc('wifi.lost')
+            self.log('WIFI connection lost, reconnecting', 0, 1)
+        if self.state == 'down':
+            self.join(self.first())
+        elif time.ticks_diff(now, self.started) >= ConnectTimeout:
+            # Timed out, try the next network
+            self.join((self.attempt + 1) % len(self.networks))
+        return False
+
+    def connected(self, now):
+        self.state = 'up'
+        self.connects += 1
+        self.connect_ms = time.ticks_diff(now, self.started)
+        metrics.inc('wifi.connects')
+        metrics.gauge('wifi.connect_ms', self.connect_ms)
+        if self.outages:
+            self.outage_ms = time.ticks_diff(now, self.lost_at)
+            self.outage_max = max(self.outage_max, self.outage_ms)
+            metrics.gauge('wifi.outage_ms', self.outage_ms)
+        ssid = self.cache['ssid'] if self.attempt < 0 else self.networks[self.attempt][0]
+        self.log('Connected to ' + ssid + ', IP Address = ' + self.wlan.ifconfig()[0] + ' (' + str(self.connect_ms) + 'ms)', 0, 1)
+        self.save(ssid)
+
+    # Connect, waiting up to timeout ms (used at start up), returns True if connected
+    def connect(self, timeout):
+        start = time.ticks_ms()
+        while not self.poll():
+            if time.ticks_diff(time.ticks_ms(), start) >= timeout:
+                return False
+            time.sleep_ms(100)
+        return True
+
+    # Time the connection has been down (ms, 0 if connected)
+    def down_ms(self):
+        if self.state == 'up':
+            return 0
+        return time.ticks_diff(time.ticks_ms(), self.lost_at)
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'connects': self.connects,
+            'outages': self.outages,
+            'connect_ms': self.connect_ms,
+            'outage_ms': self.outage_ms,
+            'outage_max_ms': self.outage_max,
+        }